@@ -2,7 +2,7 @@
 Common utilities for Neo4j projects.
 """
 
-from .neo4j_connector import Neo4jConnector, Neo4jConfig
+from .neo4j_connector import Neo4jConnector, Neo4jConfig, get_driver, shutdown_all
 
-__all__ = ['Neo4jConnector', 'Neo4jConfig']
+__all__ = ['Neo4jConnector', 'Neo4jConfig', 'get_driver', 'shutdown_all']
 
@@ -2,8 +2,13 @@
 Common Neo4j database connection management for all projects.
 """
 
+import atexit
+import hashlib
+import re
+import threading
 from neo4j import GraphDatabase, Driver, Session
-from typing import List, Dict, Any, Optional
+from neo4j.exceptions import ClientError
+from typing import List, Dict, Any, Iterator, Literal, Optional, Sequence, Tuple
 from dataclasses import dataclass
 from contextlib import contextmanager
 
@@ -17,6 +22,77 @@ class Neo4jConfig:
     database: str = "neo4j"
     max_connection_pool_size: int = 50
     connection_acquisition_timeout: int = 60
+    fetch_size: int = 1000
+
+
+# Labels are interpolated into Cypher (they can't be parameters), so only
+# plain identifiers are accepted
+_LABEL_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _validate_label(label: str) -> str:
+    """Return the label unchanged, or raise ValueError if it isn't a plain identifier."""
+    if not _LABEL_RE.match(label):
+        raise ValueError(f"Invalid node label: {label!r}")
+    return label
+
+
+# Process-wide driver cache: connectors with identical settings share one
+# Driver (and therefore one connection pool) instead of opening their own.
+_DRIVER_CACHE: Dict[tuple, Driver] = {}
+_DRIVER_LOCK = threading.Lock()
+
+
+def _driver_key(config: Neo4jConfig) -> tuple:
+    """Build the cache key for a connection configuration."""
+    password_hash = hashlib.sha256(config.password.encode("utf-8")).hexdigest()
+    return (
+        config.uri,
+        config.user,
+        password_hash,
+        config.max_connection_pool_size,
+        config.connection_acquisition_timeout
+    )
+
+
+def get_driver(config: Neo4jConfig) -> Driver:
+    """
+    Get the process-wide driver for a configuration.
+    
+    The driver (and its connection pool) is shared by every connector and
+    script built from the same settings and stays open until
+    shutdown_all() runs at exit, so callers must not close it.
+    
+    Args:
+        config: Neo4j connection configuration
+        
+    Returns:
+        Shared Neo4j driver
+    """
+    key = _driver_key(config)
+    with _DRIVER_LOCK:
+        driver = _DRIVER_CACHE.get(key)
+        if driver is None:
+            driver = GraphDatabase.driver(
+                config.uri,
+                auth=(config.user, config.password),
+                max_connection_pool_size=config.max_connection_pool_size,
+                connection_acquisition_timeout=config.connection_acquisition_timeout
+            )
+            _DRIVER_CACHE[key] = driver
+        return driver
+
+
+def shutdown_all():
+    """Close every cached driver. Registered to run at interpreter exit."""
+    with _DRIVER_LOCK:
+        drivers = list(_DRIVER_CACHE.values())
+        _DRIVER_CACHE.clear()
+    for driver in drivers:
+        driver.close()
+
+
+atexit.register(shutdown_all)
 
 
 class Neo4jConnector:
@@ -30,17 +106,20 @@ class Neo4jConnector:
             config: Neo4j connection configuration
         """
         self.config = config
-        self.driver: Driver = GraphDatabase.driver(
-            config.uri,
-            auth=(config.user, config.password),
-            max_connection_pool_size=config.max_connection_pool_size,
-            connection_acquisition_timeout=config.connection_acquisition_timeout
-        )
+        self.driver = get_driver(config)
+        self._label_counts: Optional[Dict[str, int]] = None
+        self._labels_cache: Optional[List[str]] = None
+        self._prop_cache: Dict[tuple, List[str]] = {}
     
     def close(self):
-        """Close the Neo4j driver connection."""
-        if self.driver:
-            self.driver.close()
+        """Forget cached lookups (the shared driver stays open for reuse)."""
+        self._invalidate_caches()
+    
+    def _invalidate_caches(self):
+        """Forget cached schema lookups (labels, property keys, counts)."""
+        self._label_counts = None
+        self._labels_cache = None
+        self._prop_cache.clear()
     
     def __enter__(self):
         """Context manager entry."""
@@ -62,16 +141,68 @@ class Neo4jConnector:
             Neo4j session
         """
         db = database or self.config.database
-        session = self.driver.session(database=db)
+        session = self.driver.session(database=db, fetch_size=self.config.fetch_size)
         try:
             yield session
         finally:
             session.close()
     
+    def iter_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                   database: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a Cypher query and stream the results.
+        
+        Records are pulled from the server in batches of ``config.fetch_size``;
+        the session stays open until the generator is exhausted or closed.
+        
+        Args:
+            query: Cypher query string
+            parameters: Query parameters
+            database: Optional database name
+            
+        Yields:
+            Result records as dictionaries
+        """
+        with self.session(database) as session:
+            result = session.run(query, parameters or {})
+            try:
+                for record in result:
+                    yield record.data()
+            finally:
+                # Discard any unread records if the caller stops early, so
+                # the connection goes back to the pool straight away
+                result.consume()
+    
+    def iter_values(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                    database: Optional[str] = None) -> Iterator[List[Any]]:
+        """
+        Execute a Cypher query and stream each record as a list of values.
+        
+        Like iter_query, but skips building a dict per record. Meant for
+        bulk queries that return scalar columns only (``RETURN u.id``, not
+        ``RETURN u``): returned nodes and relationships are hydrated into
+        driver graph objects, which is what makes large results expensive.
+        
+        Args:
+            query: Cypher query string
+            parameters: Query parameters
+            database: Optional database name
+            
+        Yields:
+            Record values in RETURN column order
+        """
+        with self.session(database) as session:
+            result = session.run(query, parameters or {})
+            try:
+                for record in result:
+                    yield record.values()
+            finally:
+                result.consume()
+    
     def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
                      database: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Execute a Cypher query and return results.
+        Execute a read-only Cypher query and return results.
         
         Args:
             query: Cypher query string
@@ -81,9 +212,62 @@ class Neo4jConnector:
         Returns:
             List of result records as dictionaries
         """
-        with self.session(database) as session:
-            result = session.run(query, parameters or {})
+        def _read_tx(tx):
+            result = tx.run(query, parameters or {})
             return [record.data() for record in result]
+        
+        # Managed read transaction: retried on transient errors and routed
+        # to read replicas in a cluster
+        with self.session(database) as session:
+            return session.execute_read(_read_tx)
+    
+    def execute_read_many(self, queries: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+                          database: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Execute several read-only Cypher queries in one read transaction.
+        
+        The queries run in order on one connection and commit once, instead
+        of paying a session, BEGIN and COMMIT round-trip per query. They
+        also see one consistent snapshot.
+        
+        Args:
+            queries: (query, parameters) pairs
+            database: Optional database name
+            
+        Returns:
+            One list of result records (as dictionaries) per query
+        """
+        def _read_tx(tx):
+            return [
+                [record.data() for record in tx.run(query, parameters or {})]
+                for query, parameters in queries
+            ]
+        
+        with self.session(database) as session:
+            return session.execute_read(_read_tx)
+    
+    def fetch_column(self, query: str, key: str, parameters: Optional[Dict[str, Any]] = None,
+                     database: Optional[str] = None) -> List[Any]:
+        """
+        Execute a read-only Cypher query and return a single column.
+        
+        Values are read straight off the records, skipping the per-record
+        dict that execute_query builds with record.data().
+        
+        Args:
+            query: Cypher query string
+            key: Name of the column to return
+            parameters: Query parameters
+            database: Optional database name
+            
+        Returns:
+            List of values for that column
+        """
+        def _read_tx(tx):
+            return tx.run(query, parameters or {}).value(key)
+        
+        with self.session(database) as session:
+            return session.execute_read(_read_tx)
     
     def execute_write(self, query: str, parameters: Optional[Dict[str, Any]] = None,
                      database: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -103,17 +287,66 @@ class Neo4jConnector:
             return [record.data() for record in result]
         
         with self.session(database) as session:
-            return session.execute_write(_write_tx)
+            records = session.execute_write(_write_tx)
+        
+        # Writes may change labels, property keys and counts
+        self._invalidate_caches()
+        return records
+    
+    def run_procedure(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                      database: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Run a procedure call (e.g. a GDS catalog or mutate call) and return results.
+        
+        See run_procedures().
+        
+        Args:
+            query: Cypher query string
+            parameters: Query parameters
+            database: Optional database name
+            
+        Returns:
+            List of result records as dictionaries
+        """
+        return self.run_procedures([(query, parameters)], database)[0]
+    
+    def run_procedures(self, queries: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+                       database: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Run procedure calls in order as auto-commit queries on one session.
+        
+        Unlike execute_query() and execute_write() these are not managed
+        transactions: the session keeps the default write access mode, so
+        in a cluster every call goes to the same primary (where in-memory
+        GDS graphs live), and nothing is retried on transient errors, so
+        catalog changes such as gds.graph.project are never replayed.
+        
+        Args:
+            queries: (query, parameters) pairs
+            database: Optional database name
+            
+        Returns:
+            One list of result records (as dictionaries) per query
+        """
+        with self.session(database) as session:
+            return [
+                [record.data() for record in session.run(query, parameters or {})]
+                for query, parameters in queries
+            ]
     
     def get_node_labels(self) -> List[str]:
         """
         Retrieve all node labels in the database.
         
+        The result is cached on the connector until close() or the next
+        execute_write().
+        
         Returns:
             List of node labels
         """
-        result = self.execute_query("CALL db.labels()")
-        return [record["label"] for record in result]
+        if self._labels_cache is None:
+            self._labels_cache = self.fetch_column("CALL db.labels()", "label")
+        return list(self._labels_cache)
     
     def get_node_count(self, label: str) -> int:
         """
@@ -124,28 +357,82 @@ class Neo4jConnector:
             
         Returns:
             Total number of nodes with that label
+            
+        Raises:
+            ValueError: If the label is not a plain identifier
         """
-        query = f"MATCH (n:{label}) RETURN count(n) as count"
+        _validate_label(label)
+        label_counts = self._get_label_counts()
+        if label in label_counts:
+            return label_counts[label]
+        
+        # Label-only pattern: answered from the count store, not a scan
+        query = f"MATCH (n:`{label}`) RETURN count(n) as count"
         result = self.execute_query(query)
         return result[0]["count"] if result else 0
     
-    def get_property_keys(self, label: str, sample_limit: int = 1000) -> List[str]:
+    def _get_label_counts(self) -> Dict[str, int]:
+        """
+        Get node counts for all labels from APOC's count-store metadata.
+        
+        The result is read once and cached on the connector. Returns an
+        empty dict (and callers fall back to a count query) if APOC is
+        not installed.
+        """
+        if self._label_counts is None:
+            try:
+                result = self.execute_query("CALL apoc.meta.stats() YIELD labels RETURN labels")
+                self._label_counts = dict(result[0]["labels"]) if result else {}
+            except ClientError:
+                self._label_counts = {}
+        return self._label_counts
+    
+    def get_property_keys(self, label: str, sample_limit: int = 1000,
+                          strategy: Literal["head", "random"] = "random") -> List[str]:
         """
         Get all property keys for a given label.
         
+        The "random" strategy keeps each node with probability
+        ``sample_limit / node_count`` over a full scan (no LIMIT), so about
+        ``sample_limit`` nodes are sampled uniformly from the whole label
+        instead of the first nodes in store order (which miss properties
+        added later). "head" samples the first ``sample_limit`` nodes.
+        
         Args:
             label: The node label
             sample_limit: Number of nodes to sample for property discovery
+            strategy: Sampling strategy, "random" or "head"
             
         Returns:
             List of property keys
+            
+        Raises:
+            ValueError: If the label is not a plain identifier or the
+                strategy is unknown
         """
+        _validate_label(label)
+        if strategy not in ("head", "random"):
+            raise ValueError(f"Unknown sampling strategy: {strategy!r}")
+        cache_key = (label, sample_limit, strategy)
+        if cache_key in self._prop_cache:
+            return list(self._prop_cache[cache_key])
+        
+        # Only the label is interpolated (labels can't be parameters), so
+        # each label maps to one cached plan regardless of sample size
+        if strategy == "random":
+            total = self.get_node_count(label)
+            parameters = {"p": min(1.0, sample_limit / max(total, 1))}
+            sample_clause = "WHERE rand() < $p"
+        else:
+            parameters = {"sample_limit": sample_limit}
+            sample_clause = "WITH n LIMIT $sample_limit"
         query = f"""
-        MATCH (n:{label})
-        WITH n LIMIT {sample_limit}
+        MATCH (n:`{label}`)
+        {sample_clause}
         UNWIND keys(n) as key
         RETURN DISTINCT key
         """
-        result = self.execute_query(query)
-        return [record["key"] for record in result]
+        property_keys = self.fetch_column(query, "key", parameters)
+        self._prop_cache[cache_key] = property_keys
+        return list(property_keys)
 
@@ -22,6 +22,31 @@ GRAPH_NAME = "user_property_wcc"
 USER_LABEL = "User"
 PROPERTY_LABEL = "Property"
 REL_TYPE = "HAS"
+# In-memory projection property WCC results are mutated into
+TMP_PROPERTY = "_wcc_tmp"
+TAG_BATCH_SIZE = 10000
+
+# Set REUSE_PROJECTION=1 to keep the projection between runs and skip
+# re-projecting when it still matches the database
+REUSE_PROJECTION = os.getenv("REUSE_PROJECTION") == "1"
+
+
+def projection_is_current(session) -> bool:
+    """Check that the existing projection's node count matches the database."""
+    projected = session.run(
+        "CALL gds.graph.list($name) YIELD nodeCount "
+        "RETURN nodeCount",
+        name=GRAPH_NAME,
+    ).single()
+    expected = session.run(
+        "CALL { MATCH (u:" + USER_LABEL + ") RETURN count(u) AS users } "
+        "CALL { MATCH (p:" + PROPERTY_LABEL + ") RETURN count(p) AS properties } "
+        "RETURN users + properties AS nodeCount"
+    ).single()
+    if projected is None or projected["nodeCount"] != expected["nodeCount"]:
+        print("   Existing projection is stale, re-projecting")
+        return False
+    return True
 
 
 def main() -> None:
@@ -32,18 +57,29 @@ def main() -> None:
     
     driver = GraphDatabase.driver(URI, auth=(USER, PASSWORD))
     
+    # Each step runs in its own session; the shared bookmark manager makes
+    # every session wait for the previous steps' writes (read-your-writes
+    # on a cluster)
+    bookmark_manager = GraphDatabase.bookmark_manager()
+    
+    def step_session():
+        return driver.session(database=DATABASE, bookmark_manager=bookmark_manager)
+    
     try:
-        with driver.session(database=DATABASE) as session:
-            # Step 1: Drop existing projection if it exists
-            print("\n📊 Step 1: Checking for existing graph projection...")
+        # Step 1: Drop existing projection if it exists (or reuse it)
+        print("\n📊 Step 1: Checking for existing graph projection...")
+        with step_session() as session:
             result = session.run(
                 "CALL gds.graph.exists($name) YIELD exists "
                 "RETURN exists",
                 name=GRAPH_NAME,
             )
             exists = result.single()["exists"]
+            reuse = exists and REUSE_PROJECTION and projection_is_current(session)
             
-            if exists:
+            if reuse:
+                print(f"   ✓ Reusing existing projection '{GRAPH_NAME}'")
+            elif exists:
                 print(f"   Dropping existing projection '{GRAPH_NAME}'...")
                 session.run(
                     "CALL gds.graph.drop($name) YIELD graphName "
@@ -54,88 +90,148 @@ def main() -> None:
             else:
                 print(f"   ✓ No existing projection found")
 
-            # Step 2: Project User-Property graph
+        # Step 2: Project User-Property graph
+        if not reuse:
             print(f"\n📊 Step 2: Creating graph projection '{GRAPH_NAME}'...")
             print(f"   Node labels: {USER_LABEL}, {PROPERTY_LABEL}")
             print(f"   Relationship: {REL_TYPE} (UNDIRECTED)")
             
             start_time = time.time()
-            result = session.run(
-                "CALL gds.graph.project(\n"
-                "  $name,\n"
-                "  [$user_label, $property_label],\n"
-                "  {\n"
-                "    HAS: {\n"
-                "      type: $rel_type,\n"
-                "      orientation: 'UNDIRECTED'\n"
-                "    }\n"
-                "  }\n"
-                ") YIELD nodeCount, relationshipCount",
-                name=GRAPH_NAME,
-                user_label=USER_LABEL,
-                property_label=PROPERTY_LABEL,
-                rel_type=REL_TYPE,
-            )
-            record = result.single()
+            with step_session() as session:
+                result = session.run(
+                    "CALL gds.graph.project(\n"
+                    "  $name,\n"
+                    "  [$user_label, $property_label],\n"
+                    "  {\n"
+                    "    HAS: {\n"
+                    "      type: $rel_type,\n"
+                    "      orientation: 'UNDIRECTED'\n"
+                    "    }\n"
+                    "  }\n"
+                    ") YIELD nodeCount, relationshipCount",
+                    name=GRAPH_NAME,
+                    user_label=USER_LABEL,
+                    property_label=PROPERTY_LABEL,
+                    rel_type=REL_TYPE,
+                )
+                record = result.single()
             elapsed = time.time() - start_time
             print(f"   ✓ Projection created in {elapsed:.2f}s")
             print(f"   Nodes: {record['nodeCount']:,}")
             print(f"   Relationships: {record['relationshipCount']:,}")
 
-            # Step 3: Run WCC and tag User nodes
-            print(f"\n📊 Step 3: Running WCC and tagging User nodes...")
-            print(f"   Finding connected components...")
-            
-            start_time = time.time()
+        # Step 3: Run WCC and tag User nodes
+        print(f"\n📊 Step 3: Running WCC and tagging User nodes...")
+        print(f"   Finding connected components...")
+        
+        start_time = time.time()
+        with step_session() as session:
+            # Compute WCC on the full User-Property graph (a nodeLabels filter
+            # would drop the Property nodes that connect Users) into the
+            # projection; User results are read back with a label filter
+            # inside GDS, so nothing is written to Property nodes
+            if reuse:
+                # A reused projection still holds the previous run's result
+                session.run(
+                    "CALL gds.graph.nodeProperties.drop($name, [$tmp_property], "
+                    "{failIfMissing: false}) YIELD graphName RETURN graphName",
+                    name=GRAPH_NAME,
+                    tmp_property=TMP_PROPERTY,
+                ).consume()
+            result = session.run(
+                "CALL gds.wcc.mutate($name, {mutateProperty: $tmp_property}) "
+                "YIELD componentCount",
+                name=GRAPH_NAME,
+                tmp_property=TMP_PROPERTY,
+            )
+            component_total = result.single()["componentCount"]
+            print(f"   ✓ WCC computed in {time.time() - start_time:.2f}s "
+                  f"({component_total:,} components)")
+
+            # Component size histogram from this run's result (multi-user
+            # components only)
             result = session.run(
-                "CALL gds.wcc.stream($name) "
-                "YIELD nodeId, componentId "
-                "WITH gds.util.asNode(nodeId) AS n, componentId "
-                "WHERE n:User "
-                "WITH componentId, collect(n) AS nodes, count(*) AS size "
+                "CALL gds.graph.nodeProperty.stream($name, $tmp_property, [$user_label]) "
+                "YIELD propertyValue AS componentId "
+                "WITH componentId, count(*) AS size "
                 "WHERE size > 1 "
-                "UNWIND nodes AS n "
-                "SET n.component_id = componentId "
-                "RETURN componentId, size "
-                "ORDER BY size DESC, componentId ASC",
+                "WITH componentId, size ORDER BY size DESC, componentId ASC "
+                "WITH collect([componentId, size]) AS components, sum(size) AS tagged "
+                "RETURN size(components) AS component_count, tagged, "
+                "       components[..20] AS top_components",
                 name=GRAPH_NAME,
+                tmp_property=TMP_PROPERTY,
+                user_label=USER_LABEL,
             )
-            
-            components = []
-            total_users_tagged = 0
-            for record in result:
-                comp_id = record["componentId"]
-                size = record["size"]
-                components.append((comp_id, size))
-                total_users_tagged += size
-            
-            elapsed = time.time() - start_time
-            print(f"   ✓ WCC complete in {elapsed:.2f}s")
-            print(f"   Total components found: {len(components):,}")
-            print(f"   Total users tagged: {total_users_tagged:,}")
-
-            # Step 4: Show top components
-            if components:
-                print(f"\n{'='*70}")
-                print("TOP 20 COMPONENTS BY SIZE")
-                print(f"{'='*70}")
-                print(f"{'Component ID':<20} {'Size':>10}")
-                print(f"{'-'*70}")
-                for comp_id, size in components[:20]:
-                    print(f"{comp_id:<20} {size:>10,}")
-            
-            # Step 5: Cleanup - drop the projection
-            print(f"\n📊 Step 4: Cleaning up...")
+            record = result.single()
+            component_count = record["component_count"]
+            total_users_tagged = record["tagged"]
+            components = [tuple(pair) for pair in record["top_components"]]
+
+            # Clear component_id left by earlier runs (e.g. on Users that
+            # are now singletons), in batched transactions
+            print(f"   Clearing previous {USER_LABEL} tags...")
             session.run(
-                "CALL gds.graph.drop($name) YIELD graphName "
-                "RETURN graphName",
+                "MATCH (n:" + USER_LABEL + ") WHERE n.component_id IS NOT NULL "
+                "CALL { "
+                "  WITH n "
+                "  REMOVE n.component_id "
+                "} IN TRANSACTIONS OF $batch_size ROWS",
+                batch_size=TAG_BATCH_SIZE,
+            ).consume()
+
+            # Tag Users in multi-user components, committing every
+            # TAG_BATCH_SIZE nodes. Only node ids are collected per
+            # component (no node lookups until the SET)
+            print(f"   Tagging {USER_LABEL} nodes in batches of {TAG_BATCH_SIZE:,}...")
+            session.run(
+                "CALL gds.graph.nodeProperty.stream($name, $tmp_property, [$user_label]) "
+                "YIELD nodeId, propertyValue AS componentId "
+                "WITH componentId, collect(nodeId) AS ids "
+                "WHERE size(ids) > 1 "
+                "UNWIND ids AS id "
+                "CALL { "
+                "  WITH id, componentId "
+                "  MATCH (n) WHERE id(n) = id "
+                "  SET n.component_id = componentId "
+                "} IN TRANSACTIONS OF $batch_size ROWS",
                 name=GRAPH_NAME,
-            )
-            print(f"   ✓ Dropped projection '{GRAPH_NAME}'")
-            
+                tmp_property=TMP_PROPERTY,
+                user_label=USER_LABEL,
+                batch_size=TAG_BATCH_SIZE,
+            ).consume()
+
+        elapsed = time.time() - start_time
+        print(f"   ✓ WCC complete in {elapsed:.2f}s")
+        print(f"   Total components found: {component_count:,}")
+        print(f"   Total users tagged: {total_users_tagged:,}")
+
+        # Step 4: Show top components
+        if components:
             print(f"\n{'='*70}")
-            print("✓ COMPONENT TAGGING COMPLETE")
+            print("TOP 20 COMPONENTS BY SIZE")
             print(f"{'='*70}")
+            print(f"{'Component ID':<20} {'Size':>10}")
+            print(f"{'-'*70}")
+            for comp_id, size in components:
+                print(f"{comp_id:<20} {size:>10,}")
+        
+        # Step 5: Cleanup - drop the projection (kept when reusing)
+        print(f"\n📊 Step 4: Cleaning up...")
+        if REUSE_PROJECTION:
+            print(f"   ✓ Keeping projection '{GRAPH_NAME}' for the next run")
+        else:
+            with step_session() as session:
+                session.run(
+                    "CALL gds.graph.drop($name) YIELD graphName "
+                    "RETURN graphName",
+                    name=GRAPH_NAME,
+                ).consume()
+            print(f"   ✓ Dropped projection '{GRAPH_NAME}'")
+        
+        print(f"\n{'='*70}")
+        print("✓ COMPONENT TAGGING COMPLETE")
+        print(f"{'='*70}")
             
     finally:
         driver.close()
@@ -2,6 +2,7 @@
 Main analyzer class that orchestrates the analysis workflow.
 """
 
+import weakref
 from typing import Dict, Optional
 import pandas as pd
 
@@ -13,6 +14,11 @@ from .report_generator import ReportGenerator
 from .performance import PerformanceMonitor
 
 
+# Labels with at least this many nodes get no value histograms in
+# Cypher-only reports
+HISTOGRAM_MAX_NODES = 50_000
+
+
 class Neo4jPropertyAnalyzer:
     """
     Main analyzer class for Neo4j property analysis.
@@ -27,8 +33,10 @@ class Neo4jPropertyAnalyzer:
         user: str,
         password: str,
         max_workers: int = 4,
-        fetch_size: int = 1000,
-        performance_monitor: Optional[PerformanceMonitor] = None
+        fetch_size: Optional[int] = None,
+        use_apoc_sampling: bool = False,
+        performance_monitor: Optional[PerformanceMonitor] = None,
+        database: Optional[str] = None
     ):
         """
         Initialize the analyzer.
@@ -37,33 +45,45 @@ class Neo4jPropertyAnalyzer:
             uri: Neo4j database URI
             user: Database username
             password: Database password
-            max_workers: Number of parallel workers (for future use)
-            fetch_size: Number of records to fetch per batch
+            max_workers: Number of parallel workers for fast-mode analysis
+            fetch_size: Number of records to fetch per batch. None uses the
+                connection default for queries and lets the extractor size
+                batches per extraction
+            use_apoc_sampling: Sample nodes with apoc.coll.randomItems instead
+                of a rand() filter
             performance_monitor: Optional performance monitor for tracking metrics
+            database: Database to analyze (None for the server default)
         """
-        # Create connection config
+        # Create connection config (pool must fit one session per worker)
         conn_config = Neo4jConnectionConfig(
             uri=uri,
             user=user,
             password=password,
-            fetch_size=fetch_size
+            max_connection_pool_size=max(Neo4jConnectionConfig.max_connection_pool_size, max_workers),
+            fetch_size=fetch_size or Neo4jConnectionConfig.fetch_size,
+            database=database
         )
 
         # Initialize components
         self.connection = Neo4jConnection(conn_config)
         self.extractor = DataExtractor(
             self.connection.driver,
-            fetch_size=fetch_size
+            fetch_size=fetch_size,
+            use_apoc_sampling=use_apoc_sampling,
+            database=database
         )
-        self.property_analyzer = PropertyAnalyzer()
+        self.property_analyzer = PropertyAnalyzer(self.connection.driver, database)
         self.report_generator = ReportGenerator()
         self.max_workers = max_workers
         self.performance_monitor = performance_monitor or PerformanceMonitor()
         self.performance_monitor.enabled = performance_monitor is not None
+
+        # Release the connection even if the caller never calls close()
+        self._finalizer = weakref.finalize(self, self.connection.close)
     
     def close(self):
         """Close the Neo4j connection."""
-        self.connection.close()
+        self._finalizer()
     
     def __enter__(self):
         """Context manager entry."""
@@ -159,24 +179,22 @@ class Neo4jPropertyAnalyzer:
             self.performance_monitor.stop(prop_metric)
             print(f"Found properties: {property_keys}")
 
-            total_count = self.get_node_count(label)
-            summary = {}
-
-            # Analyze each property
-            for prop_key in property_keys:
-                print(f"  Analyzing property: {prop_key}...")
-                prop_analysis_metric = self.performance_monitor.start(
-                    "analyze_property_cypher",
-                    label=label,
-                    property=prop_key
-                )
-                summary[prop_key] = self.property_analyzer.get_property_stats_cypher(
+            analysis_metric = self.performance_monitor.start(
+                "analyze_properties_cypher",
+                label=label,
+                properties=len(property_keys)
+            )
+            try:
+                summary = self.property_analyzer.analyze_properties_cypher(
                     self.connection.driver,
                     label,
-                    prop_key,
-                    total_count
+                    property_keys,
+                    max_workers=self.max_workers,
+                    performance_monitor=self.performance_monitor,
+                    database=self.connection.config.database
                 )
-                self.performance_monitor.stop(prop_analysis_metric)
+            finally:
+                self.performance_monitor.stop(analysis_metric)
 
             return summary
         finally:
@@ -188,7 +206,8 @@ class Neo4jPropertyAnalyzer:
         output_html: Optional[str] = None,
         limit: Optional[int] = None,
         sample_size: Optional[int] = None,
-        minimal: bool = False
+        minimal: bool = False,
+        cypher_only: bool = False
     ):
         """
         Analyze properties and generate profiling report.
@@ -199,10 +218,16 @@ class Neo4jPropertyAnalyzer:
             limit: Maximum number of nodes
             sample_size: Random sample size
             minimal: Generate minimal report
+            cypher_only: Build the report from Cypher aggregations instead of
+                loading nodes into a DataFrame (limit, sample_size and
+                minimal are ignored)
             
         Returns:
-            ProfileReport object
+            ProfileReport object, or the rendered HTML when cypher_only is set
         """
+        if cypher_only:
+            return self._analyze_properties_cypher(label, output_html)
+        
         print(f"\nAnalyzing properties for label: {label}")
         df = self.extract_nodes_to_dataframe(label, limit, sample_size)
         
@@ -215,4 +240,38 @@ class Neo4jPropertyAnalyzer:
         return self.report_generator.generate_profiling_report(
             df, label, output_html, minimal
         )
-
+    
+    def _analyze_properties_cypher(self, label: str, output_html: Optional[str] = None) -> Optional[str]:
+        """
+        Generate an HTML report without building a DataFrame.
+        
+        Args:
+            label: Node label to analyze
+            output_html: Path to save HTML report
+            
+        Returns:
+            Rendered HTML, or None if the label has no properties
+        """
+        # Summary and histogram queries share one session where possible
+        with self.property_analyzer:
+            summary = self.get_property_summary_fast(label)
+            if not summary:
+                print(f"No properties found for label: {label}")
+                return None
+            
+            # Value histograms are only worth a scan on smaller labels
+            histogram_keys = [
+                key for key, info in summary.items()
+                if info["total_values"] < HISTOGRAM_MAX_NODES
+            ]
+            histograms = self.property_analyzer.get_value_histograms_cypher(
+                self.connection.driver,
+                label,
+                histogram_keys,
+                performance_monitor=self.performance_monitor,
+                database=self.connection.config.database
+            )
+        
+        return self.report_generator.generate_cypher_report(
+            summary, histograms, label, output_html
+        )
@@ -15,6 +15,7 @@ class Neo4jConnectionConfig:
     max_connection_pool_size: int = 50
     connection_acquisition_timeout: int = 60
     fetch_size: int = 1000
+    database: Optional[str] = None
 
 
 @dataclass
@@ -24,6 +25,7 @@ class AnalysisConfig:
     sample_size: Optional[int] = None
     minimal_report: bool = False
     output_html: Optional[str] = None
+    use_apoc_sampling: bool = False
 
 
 @dataclass
@@ -50,14 +52,16 @@ class AnalyzerConfig:
             password=config_dict.get("password", "password"),
             max_connection_pool_size=config_dict.get("max_connection_pool_size", 50),
             connection_acquisition_timeout=config_dict.get("connection_acquisition_timeout", 60),
-            fetch_size=config_dict.get("fetch_size", 1000)
+            fetch_size=config_dict.get("fetch_size", 1000),
+            database=config_dict.get("database")
         )
         
         analysis_config = AnalysisConfig(
             limit=config_dict.get("limit"),
             sample_size=config_dict.get("sample_size"),
             minimal_report=config_dict.get("minimal_report", False),
-            output_html=config_dict.get("output_html")
+            output_html=config_dict.get("output_html"),
+            use_apoc_sampling=config_dict.get("use_apoc_sampling", False)
         )
         
         return cls(
@@ -2,10 +2,31 @@
 Neo4j database connection management.
 """
 
-from neo4j import GraphDatabase, Driver
-from typing import List
+import re
+import sys
+from pathlib import Path
+from neo4j import Session
+from neo4j.exceptions import ClientError
+from typing import Any, Dict, Iterator, List, Literal, Optional
+from contextlib import contextmanager
 from .config import Neo4jConnectionConfig
 
+# The driver cache is shared with the other projects through common/
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+from common import Neo4jConfig, get_driver
+
+
+# Labels are interpolated into Cypher (they can't be parameters), so only
+# plain identifiers are accepted
+_LABEL_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _validate_label(label: str) -> str:
+    """Return the label unchanged, or raise ValueError if it isn't a plain identifier."""
+    if not _LABEL_RE.match(label):
+        raise ValueError(f"Invalid node label: {label!r}")
+    return label
+
 
 class Neo4jConnection:
     """Manages Neo4j database connections."""
@@ -18,17 +39,28 @@ class Neo4jConnection:
             config: Neo4j connection configuration
         """
         self.config = config
-        self.driver: Driver = GraphDatabase.driver(
-            config.uri,
-            auth=(config.user, config.password),
+        # Connections with identical settings share one process-wide driver
+        # (and connection pool), closed at interpreter exit
+        self.driver = get_driver(Neo4jConfig(
+            uri=config.uri,
+            user=config.user,
+            password=config.password,
             max_connection_pool_size=config.max_connection_pool_size,
             connection_acquisition_timeout=config.connection_acquisition_timeout
-        )
+        ))
+        self._label_counts: Optional[Dict[str, int]] = None
+        self._labels_cache: Optional[List[str]] = None
+        self._prop_cache: Dict[tuple, List[str]] = {}
     
     def close(self):
-        """Close the Neo4j driver connection."""
-        if self.driver:
-            self.driver.close()
+        """Forget cached lookups (the shared driver stays open for reuse)."""
+        self._invalidate_caches()
+    
+    def _invalidate_caches(self):
+        """Forget cached schema lookups (labels, property keys, counts)."""
+        self._label_counts = None
+        self._labels_cache = None
+        self._prop_cache.clear()
     
     def __enter__(self):
         """Context manager entry."""
@@ -38,17 +70,155 @@ class Neo4jConnection:
         """Context manager exit."""
         self.close()
     
+    @contextmanager
+    def session(self) -> Session:
+        """
+        Get a Neo4j session that fetches records in batches of ``fetch_size``.
+        
+        Yields:
+            Neo4j session
+        """
+        session = self.driver.session(
+            database=self.config.database,
+            fetch_size=self.config.fetch_size
+        )
+        try:
+            yield session
+        finally:
+            session.close()
+    
+    def iter_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a Cypher query and stream the results.
+        
+        Args:
+            query: Cypher query string
+            parameters: Query parameters
+            
+        Yields:
+            Result records as dictionaries
+        """
+        with self.session() as session:
+            result = session.run(query, parameters or {})
+            try:
+                for record in result:
+                    yield record.data()
+            finally:
+                # Discard any unread records if the caller stops early, so
+                # the connection goes back to the pool straight away
+                result.consume()
+    
+    def iter_nodes_by_key(self, label: str, key_prop: str,
+                          page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Page through all nodes of a label using keyset pagination.
+        
+        Each page resumes after the last key seen instead of using SKIP.
+        This needs a range index on (label, key_prop): later pages are
+        then an index range seek from the cursor, so page cost stays
+        constant regardless of how deep the scan is. Without the index
+        every page scans and sorts the whole label. The key property
+        should be unique; nodes without it are skipped.
+        
+        Args:
+            label: Node label to scan
+            key_prop: Monotone, unique property to order and page by
+            page_size: Number of nodes fetched per read transaction
+        
+        Yields:
+            Node properties as dictionaries, in key order
+        
+        Raises:
+            ValueError: If the label or key property is not a valid identifier
+        """
+        _validate_label(label)
+        if not _LABEL_RE.match(key_prop):
+            raise ValueError(f"Invalid key property: {key_prop!r}")
+        # Separate texts for the first and later pages: an OR with
+        # "$cursor IS NULL" would keep the planner from using a range seek
+        first_query = (
+            f"MATCH (n:`{label}`) "
+            f"WHERE n.`{key_prop}` IS NOT NULL "
+            f"RETURN n.`{key_prop}` AS key, properties(n) AS props "
+            f"ORDER BY n.`{key_prop}` LIMIT $page"
+        )
+        next_query = (
+            f"MATCH (n:`{label}`) "
+            f"WHERE n.`{key_prop}` > $cursor "
+            f"RETURN n.`{key_prop}` AS key, properties(n) AS props "
+            f"ORDER BY n.`{key_prop}` LIMIT $page"
+        )
+        
+        def _read_page(tx, cursor):
+            if cursor is None:
+                result = tx.run(first_query, page=page_size)
+            else:
+                result = tx.run(next_query, cursor=cursor, page=page_size)
+            return [(record["key"], record["props"]) for record in result]
+        
+        cursor = None
+        with self.session() as session:
+            while True:
+                page = session.execute_read(_read_page, cursor)
+                for _, props in page:
+                    yield props
+                if len(page) < page_size:
+                    break
+                cursor = page[-1][0]
+    
+    def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a read-only Cypher query and return all results.
+        
+        Args:
+            query: Cypher query string
+            parameters: Query parameters
+            
+        Returns:
+            List of result records as dictionaries
+        """
+        def _read_tx(tx):
+            result = tx.run(query, parameters or {})
+            return [record.data() for record in result]
+        
+        # Managed read transaction: retried on transient errors and routed
+        # to read replicas in a cluster
+        with self.session() as session:
+            return session.execute_read(_read_tx)
+    
+    def fetch_column(self, query: str, key: str, parameters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Execute a read-only Cypher query and return a single column.
+        
+        Values are read straight off the records, skipping the per-record
+        dict that execute_query builds with record.data().
+        
+        Args:
+            query: Cypher query string
+            key: Name of the column to return
+            parameters: Query parameters
+            
+        Returns:
+            List of values for that column
+        """
+        def _read_tx(tx):
+            return tx.run(query, parameters or {}).value(key)
+        
+        with self.session() as session:
+            return session.execute_read(_read_tx)
+    
     def get_node_labels(self) -> List[str]:
         """
         Retrieve all node labels in the database.
         
+        The result is cached on the connector until close().
+        
         Returns:
             List of node labels
         """
-        with self.driver.session() as session:
-            result = session.run("CALL db.labels()")
-            labels = [record["label"] for record in result]
-        return labels
+        if self._labels_cache is None:
+            self._labels_cache = self.fetch_column("CALL db.labels()", "label")
+        return list(self._labels_cache)
     
     def get_node_count(self, label: str) -> int:
         """
@@ -59,33 +229,82 @@ class Neo4jConnection:
             
         Returns:
             Total number of nodes with that label
+            
+        Raises:
+            ValueError: If the label is not a plain identifier
+        """
+        _validate_label(label)
+        label_counts = self._get_label_counts()
+        if label in label_counts:
+            return label_counts[label]
+        
+        # Label-only pattern: answered from the count store, not a scan
+        query = f"MATCH (n:`{label}`) RETURN count(n) as count"
+        result = self.execute_query(query)
+        return result[0]["count"] if result else 0
+    
+    def _get_label_counts(self) -> Dict[str, int]:
         """
-        query = f"MATCH (n:{label}) RETURN count(n) as count"
-        with self.driver.session() as session:
-            result = session.run(query)
-            return result.single()["count"]
+        Get node counts for all labels from APOC's count-store metadata.
+        
+        The result is read once and cached on the connector. Returns an
+        empty dict (and callers fall back to a count query) if APOC is
+        not installed.
+        """
+        if self._label_counts is None:
+            try:
+                result = self.execute_query("CALL apoc.meta.stats() YIELD labels RETURN labels")
+                self._label_counts = dict(result[0]["labels"]) if result else {}
+            except ClientError:
+                self._label_counts = {}
+        return self._label_counts
     
-    def get_property_keys(self, label: str, sample_limit: int = 1000) -> List[str]:
+    def get_property_keys(self, label: str, sample_limit: int = 1000,
+                          strategy: Literal["head", "random"] = "random") -> List[str]:
         """
         Get all property keys for a given label.
         
+        The "random" strategy keeps each node with probability
+        ``sample_limit / node_count`` over a full scan (no LIMIT), so about
+        ``sample_limit`` nodes are sampled uniformly from the whole label
+        instead of the first nodes in store order (which miss properties
+        added later). "head" samples the first ``sample_limit`` nodes.
+        
         Args:
             label: The node label
             sample_limit: Number of nodes to sample for property discovery
+            strategy: Sampling strategy, "random" or "head"
             
         Returns:
             List of property keys
+            
+        Raises:
+            ValueError: If the label is not a plain identifier or the
+                strategy is unknown
         """
+        _validate_label(label)
+        if strategy not in ("head", "random"):
+            raise ValueError(f"Unknown sampling strategy: {strategy!r}")
+        cache_key = (label, sample_limit, strategy)
+        if cache_key in self._prop_cache:
+            return list(self._prop_cache[cache_key])
+        
+        # Only the label is interpolated (labels can't be parameters), so
+        # each label maps to one cached plan regardless of sample size
+        if strategy == "random":
+            total = self.get_node_count(label)
+            parameters = {"p": min(1.0, sample_limit / max(total, 1))}
+            sample_clause = "WHERE rand() < $p"
+        else:
+            parameters = {"sample_limit": sample_limit}
+            sample_clause = "WITH n LIMIT $sample_limit"
         query = f"""
-        MATCH (n:{label})
-        WITH n LIMIT {sample_limit}
+        MATCH (n:`{label}`)
+        {sample_clause}
         UNWIND keys(n) as key
         RETURN DISTINCT key
         """
-        
-        with self.driver.session() as session:
-            result = session.run(query)
-            property_keys = [record["key"] for record in result]
-        
-        return property_keys
+        property_keys = self.fetch_column(query, "key", parameters)
+        self._prop_cache[cache_key] = property_keys
+        return list(property_keys)
 
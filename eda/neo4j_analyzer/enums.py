@@ -3,6 +3,9 @@ Enumerations for the Neo4j Property Analyzer.
 """
 
 from enum import Enum
+from typing import List, Sequence
+
+import numpy as np
 
 
 class PropertyType(Enum):
@@ -33,6 +36,31 @@ class PropertyType(Enum):
             return cls.SEMI_UNIQUE
 
 
+# Vectorized form of PropertyType.from_unique_ratio: a ratio falls in
+# bucket searchsorted(UNIQUE_RATIO_THRESHOLDS, ratio, side="right")
+UNIQUE_RATIO_THRESHOLDS = np.array([0.05, 0.5, 1.0])
+UNIQUE_RATIO_TYPES = np.array([
+    PropertyType.HIGHLY_CATEGORICAL,
+    PropertyType.CATEGORICAL,
+    PropertyType.SEMI_UNIQUE,
+    PropertyType.UNIQUE
+], dtype=object)
+
+
+def classify_unique_ratios(ratios: Sequence[float]) -> List[PropertyType]:
+    """
+    Determine property types for many unique ratios at once.
+    
+    Args:
+        ratios: Ratios of unique values to total values (0.0 to 1.0)
+        
+    Returns:
+        PropertyType for each ratio, same as from_unique_ratio
+    """
+    buckets = np.searchsorted(UNIQUE_RATIO_THRESHOLDS, np.asarray(ratios, dtype=float), side="right")
+    return list(UNIQUE_RATIO_TYPES[buckets])
+
+
 class AnalysisMode(Enum):
     """Analysis mode for property analysis."""
     FAST = "fast"  # Uses Cypher aggregations
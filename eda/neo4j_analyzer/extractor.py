@@ -1,26 +1,91 @@
 """
-Data extraction from Neo4j to pandas DataFrames.
+Data extraction from Neo4j to pandas DataFrames (or pyarrow Tables).
 """
 
+import os
+import sys
 import pandas as pd
 import time
-from typing import Optional
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
 from neo4j import Driver
 
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for extract_nodes_to_arrow
+    pa = None
+
 
 class DataExtractor:
-    """Extracts data from Neo4j into pandas DataFrames."""
+    """
+    Extracts data from Neo4j into pandas DataFrames.
+    
+    Used as a context manager, the extractor reuses one session for all
+    extractions until exit. That session is opened on first use with the
+    fetch size chosen for that extraction; outside a ``with`` block every
+    extraction opens its own session sized for it.
+    """
     
-    def __init__(self, driver: Driver, fetch_size: int = 1000):
+    def __init__(
+        self,
+        driver: Driver,
+        fetch_size: Optional[int] = None,
+        use_apoc_sampling: bool = False,
+        database: Optional[str] = None
+    ):
         """
         Initialize data extractor.
         
         Args:
             driver: Neo4j driver instance
-            fetch_size: Number of records to fetch per batch
+            fetch_size: Number of records to fetch per batch. None picks a
+                size per extraction (see _choose_fetch_size)
+            use_apoc_sampling: Sample with apoc.coll.randomItems (exact
+                sample size, requires APOC) instead of a rand() filter
+            database: Database to read from (None for the server default;
+                naming it saves the driver a home-database lookup)
         """
         self.driver = driver
         self.fetch_size = fetch_size
+        self.use_apoc_sampling = use_apoc_sampling
+        self.database = database
+        self._session = None
+        self._session_fetch_size: Optional[int] = None
+        self._entered = False
+        # EDA_QUIET=1 silences per-batch progress output
+        self.quiet = os.getenv("EDA_QUIET", "") not in ("", "0")
+    
+    def __enter__(self):
+        """Context manager entry."""
+        self._entered = True
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit: close the shared session, if one was opened."""
+        self._entered = False
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    @contextmanager
+    def _open_session(self, fetch_size: int):
+        """
+        Yield the shared session when entered, otherwise a new one.
+        
+        The fetch size is fixed per session, so the shared session is
+        reopened whenever an extraction asks for a different one.
+        """
+        if self._entered:
+            if self._session is not None and self._session_fetch_size != fetch_size:
+                self._session.close()
+                self._session = None
+            if self._session is None:
+                self._session = self.driver.session(database=self.database, fetch_size=fetch_size)
+                self._session_fetch_size = fetch_size
+            yield self._session
+        else:
+            with self.driver.session(database=self.database, fetch_size=fetch_size) as session:
+                yield session
     
     def extract_nodes_to_dataframe(
         self,
@@ -41,67 +106,294 @@ class DataExtractor:
         Returns:
             pandas DataFrame containing node properties
         """
+        columns = self._extract_columns(label, total_count, limit, sample_size)
+        
+        # The column lists are already owned here; don't let pandas copy them
+        return pd.DataFrame(columns, copy=False)
+    
+    def extract_nodes_to_arrow(
+        self,
+        label: str,
+        total_count: int,
+        limit: Optional[int] = None,
+        sample_size: Optional[int] = None
+    ) -> "pa.Table":
+        """
+        Extract nodes of a specific label into a pyarrow Table.
+        
+        Skips pandas' block manager entirely; use
+        ``table.to_pandas(split_blocks=True, self_destruct=True)`` when a
+        DataFrame is needed, or ``pyarrow.parquet.write_table`` to spill a
+        large extraction to disk. Columns whose values don't share one
+        Arrow type (mixed types, Neo4j temporal/spatial values) are stored
+        as strings.
+        
+        Args:
+            label: The node label to extract
+            total_count: Total number of nodes with this label
+            limit: Maximum number of nodes to extract (None for all)
+            sample_size: If set, randomly sample this many nodes
+            
+        Returns:
+            pyarrow Table containing node properties
+            
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if pa is None:
+            raise ImportError("extract_nodes_to_arrow requires pyarrow (pip install pyarrow)")
+        
+        columns = self._extract_columns(label, total_count, limit, sample_size)
+        
+        arrays = {}
+        for name in list(columns):
+            # Pop as we go so each Python list is freed once converted
+            values = columns.pop(name)
+            try:
+                arrays[name] = pa.array(values)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                arrays[name] = pa.array(
+                    [None if value is None else str(value) for value in values],
+                    type=pa.string()
+                )
+        return pa.table(arrays)
+    
+    def _extract_columns(
+        self,
+        label: str,
+        total_count: int,
+        limit: Optional[int],
+        sample_size: Optional[int]
+    ) -> Dict[str, List]:
+        """
+        Run an extraction and return its values column by column.
+        
+        Returns:
+            Dictionary of {column: values}, including _node_element_id
+        """
         print(f"Total nodes with label '{label}': {total_count:,}")
         
         # Build query based on parameters
-        query = self._build_extraction_query(label, total_count, limit, sample_size)
+        query, params = self._build_extraction_query(label, total_count, limit, sample_size)
+        fetch_size = self._choose_fetch_size(total_count, limit, sample_size)
         
         # Extract data
         start_time = time.time()
-        records = self._execute_extraction(query)
+        columns, node_count = self._execute_extraction(query, params, fetch_size)
         elapsed = time.time() - start_time
         
-        print(f"Extracted {len(records):,} nodes in {elapsed:.2f} seconds")
+        print(f"Extracted {node_count:,} nodes in {elapsed:.2f} seconds")
         
-        return pd.DataFrame(records)
+        return columns
     
-    def _build_extraction_query(
+    def extract_nodes_columnar(
         self,
         label: str,
+        property_keys: List[str],
+        total_count: int,
+        limit: Optional[int] = None,
+        sample_size: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Extract known properties of a label into a pandas DataFrame.
+        
+        Faster alternative to extract_nodes_to_dataframe when the property
+        keys are already known (e.g. from get_property_keys): each property
+        is returned as its own scalar column, so no per-node property map
+        is built on the server or decoded by the driver. Properties not in
+        property_keys are not extracted.
+        
+        Args:
+            label: The node label to extract
+            property_keys: Properties to extract, in column order
+            total_count: Total number of nodes with this label
+            limit: Maximum number of nodes to extract (None for all)
+            sample_size: If set, randomly sample this many nodes
+            
+        Returns:
+            pandas DataFrame with one column per property key
+        """
+        print(f"Total nodes with label '{label}': {total_count:,}")
+        
+        return_clause = ", ".join(
+            [f"n.`{key.replace('`', '``')}` AS c{i}" for i, key in enumerate(property_keys)]
+            + ["elementId(n) AS element_id"]
+        )
+        query, params = self._build_extraction_query(
+            label, total_count, limit, sample_size, return_clause
+        )
+        fetch_size = self._choose_fetch_size(total_count, limit, sample_size)
+        
+        start_time = time.time()
+        columns: List[List] = [[] for _ in range(len(property_keys) + 1)]
+        appends = [column.append for column in columns]
+        progress = None if self.quiet else sys.stdout.write
+        with self._open_session(fetch_size) as session:
+            result = session.run(query, params)
+            node_count = 0
+            for record in result:
+                for append, value in zip(appends, record.values()):
+                    append(value)
+                node_count += 1
+                
+                if progress and node_count % 10000 == 0:
+                    progress(f"  Processed {node_count:,} nodes...\n")
+                    if node_count % 100_000 == 0:
+                        sys.stdout.flush()
+        elapsed = time.time() - start_time
+        
+        print(f"Extracted {node_count:,} nodes in {elapsed:.2f} seconds")
+        
+        data = dict(zip(property_keys, columns))
+        data['_node_element_id'] = columns[-1]
+        return pd.DataFrame(data, copy=False)
+    
+    def _choose_fetch_size(
+        self,
         total_count: int,
         limit: Optional[int],
         sample_size: Optional[int]
-    ) -> str:
-        """Build the Cypher query for data extraction."""
+    ) -> int:
+        """
+        Pick the Bolt fetch size for an extraction.
+        
+        Small batches mean one network round-trip per batch, which dominates
+        on large results; fetching everything at once (-1) avoids the
+        round-trips but buffers the whole result in the driver. Small
+        extractions are therefore fetched eagerly, and larger ones lazily in
+        batches of about 1/20th of the result (4,000 to 100,000 records).
+        An explicit fetch_size passed to the constructor always wins.
+        
+        Args:
+            total_count: Total number of nodes with this label
+            limit: Maximum number of nodes to extract
+            sample_size: Random sample size
+            
+        Returns:
+            Fetch size to use for the session (-1 fetches all records)
+        """
+        if self.fetch_size is not None:
+            return self.fetch_size
+        
+        expected = min(sample_size or limit or total_count, total_count)
+        if expected <= 50_000:
+            return -1
+        return min(max(4000, expected // 20), 100_000)
+    
+    def _build_extraction_query(
+        self,
+        label: str,
+        total_count: int,
+        limit: Optional[int],
+        sample_size: Optional[int],
+        return_clause: str = "properties(n) as props, elementId(n) as element_id"
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the Cypher query for data extraction.
+        
+        Only the label is interpolated (labels can't be parameters); limits
+        and probabilities are passed as parameters so the query text, and
+        therefore the cached plan, is shared between calls.
+        
+        Args:
+            label: Node label to extract
+            total_count: Total number of nodes with this label
+            limit: Maximum number of nodes
+            sample_size: Random sample size
+            return_clause: Expressions to return for each node ``n``
+            
+        Returns:
+            Tuple of (query, parameters)
+        """
         if sample_size and sample_size < total_count:
-            print(f"Randomly sampling {sample_size:,} nodes...")
+            if self.use_apoc_sampling:
+                print(f"Randomly sampling {sample_size:,} nodes...")
+                return f"""
+                MATCH (n:{label})
+                WITH collect(n) AS ns
+                UNWIND apoc.coll.randomItems(ns, $k) AS n
+                RETURN {return_clause}
+                """, {"k": sample_size}
+            # Single-pass Bernoulli sample instead of sorting every node by
+            # rand(): each node is kept with probability k/N, so the sample
+            # is uniform over the whole label and its size is close to (not
+            # exactly) k. No LIMIT, which would cut the scan short and only
+            # sample the start of the label in store order
+            p = min(1.0, sample_size / total_count)
+            print(f"Randomly sampling ~{sample_size:,} nodes...")
             return f"""
             MATCH (n:{label})
-            WITH n, rand() as r
-            ORDER BY r
-            LIMIT {sample_size}
-            RETURN properties(n) as props, elementId(n) as element_id
-            """
+            WHERE rand() < $p
+            RETURN {return_clause}
+            """, {"p": p}
         elif limit and limit < total_count:
             print(f"Fetching first {limit:,} nodes...")
             return f"""
             MATCH (n:{label})
-            RETURN properties(n) as props, elementId(n) as element_id
-            LIMIT {limit}
-            """
+            RETURN {return_clause}
+            LIMIT $k
+            """, {"k": limit}
         else:
             print(f"Fetching all {total_count:,} nodes...")
             return f"""
             MATCH (n:{label})
-            RETURN properties(n) as props, elementId(n) as element_id
-            """
+            RETURN {return_clause}
+            """, {}
     
-    def _execute_extraction(self, query: str) -> list:
-        """Execute the extraction query and return records."""
-        records = []
+    def _execute_extraction(
+        self,
+        query: str,
+        params: Dict[str, Any],
+        fetch_size: int
+    ) -> Tuple[Dict[str, List], int]:
+        """
+        Execute the extraction query and collect values column by column.
+
+        Building one list per property (instead of one dict per node) avoids
+        a per-record dict allocation and lets pandas construct each column
+        directly. Columns are padded with None lazily, so each node only
+        costs work proportional to the properties it actually has.
+
+        Args:
+            query: Extraction query returning props and element_id
+            params: Query parameters
+            fetch_size: Bolt fetch size for the session
+            
+        Returns:
+            Tuple of ({column: values}, number of nodes)
+        """
+        columns: Dict[str, List] = {}
+        element_ids: List = []
+        node_count = 0
+        progress = None if self.quiet else sys.stdout.write
         
-        with self.driver.session(fetch_size=self.fetch_size) as session:
-            result = session.run(query)
+        with self._open_session(fetch_size) as session:
+            result = session.run(query, params)
             
-            batch_count = 0
-            for record in result:
-                node_data = record["props"].copy()
-                node_data['_node_element_id'] = record["element_id"]
-                records.append(node_data)
+            # Records are tuples of (props, element_id); the driver decodes a
+            # fresh props map per record, so it is read in place, never copied
+            for props, element_id in result:
+                for key, value in props.items():
+                    column = columns.get(key)
+                    if column is None:
+                        # New property: back-fill earlier nodes with None
+                        column = columns[key] = [None] * node_count
+                    elif len(column) < node_count:
+                        # Catch up on nodes that didn't have this property
+                        column.extend([None] * (node_count - len(column)))
+                    column.append(value)
+                element_ids.append(element_id)
+                node_count += 1
                 
-                batch_count += 1
-                if batch_count % 10000 == 0:
-                    print(f"  Processed {batch_count:,} nodes...")
+                if progress and node_count % 10000 == 0:
+                    progress(f"  Processed {node_count:,} nodes...\n")
+                    if node_count % 100_000 == 0:
+                        sys.stdout.flush()
         
-        return records
-
+        # Pad sparse columns once at the end instead of after every node
+        for column in columns.values():
+            if len(column) < node_count:
+                column.extend([None] * (node_count - len(column)))
+        
+        columns['_node_element_id'] = element_ids
+        return columns, node_count
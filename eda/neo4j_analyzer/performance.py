@@ -6,6 +6,7 @@ import time
 import functools
 import psutil
 import os
+import threading
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -25,7 +26,7 @@ class PerformanceMetric:
 
     def stop(self, end_memory_mb: Optional[float] = None):
         """Stop timing and calculate duration."""
-        self.end_time = time.time()
+        self.end_time = time.perf_counter()
         self.duration = self.end_time - self.start_time
         if end_memory_mb is not None and self.start_memory_mb is not None:
             self.end_memory_mb = end_memory_mb
@@ -39,8 +40,17 @@ class PerformanceMetric:
         return f"{self.name}: In progress..."
 
 
+# Memory readings younger than this are reused instead of asking the OS again
+MEMORY_SAMPLE_TTL = 0.05
+
+
 class PerformanceMonitor:
-    """Monitors and tracks performance metrics."""
+    """
+    Monitors and tracks performance metrics.
+
+    Safe to share between threads. Timings use time.perf_counter(), so
+    metric start/end times are only meaningful relative to each other.
+    """
 
     def __init__(self):
         """Initialize performance monitor."""
@@ -49,14 +59,25 @@ class PerformanceMonitor:
         self.enabled = True
         self.process = psutil.Process(os.getpid())
         self.config: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._memory_mb: Optional[float] = None
+        self._memory_sampled_at = 0.0
 
     def set_config(self, config: Dict[str, Any]):
         """Store configuration for reporting."""
         self.config = config
 
     def _get_memory_mb(self) -> float:
-        """Get current memory usage in MB."""
-        return self.process.memory_info().rss / 1024 / 1024
+        """Get current memory usage in MB (cached for MEMORY_SAMPLE_TTL seconds)."""
+        now = time.perf_counter()
+        with self._lock:
+            if self._memory_mb is not None and now - self._memory_sampled_at < MEMORY_SAMPLE_TTL:
+                return self._memory_mb
+        memory_mb = self.process.memory_info().rss / 1024 / 1024
+        with self._lock:
+            self._memory_mb = memory_mb
+            self._memory_sampled_at = now
+        return memory_mb
     
     def start(self, name: str, **metadata) -> PerformanceMetric:
         """
@@ -64,7 +85,8 @@ class PerformanceMonitor:
 
         Args:
             name: Name of the operation
-            **metadata: Additional metadata to store
+            **metadata: Additional metadata to store. Pass track_memory=False
+                to skip memory sampling for this metric
 
         Returns:
             PerformanceMetric instance
@@ -72,14 +94,16 @@ class PerformanceMonitor:
         if not self.enabled:
             return None
 
+        track_memory = metadata.pop("track_memory", True)
         metric = PerformanceMetric(
             name=name,
-            start_time=time.time(),
-            start_memory_mb=self._get_memory_mb(),
+            start_time=time.perf_counter(),
+            start_memory_mb=self._get_memory_mb() if track_memory else None,
             metadata=metadata
         )
-        self.metrics.append(metric)
-        self.current_metric = metric
+        with self._lock:
+            self.metrics.append(metric)
+            self.current_metric = metric
         return metric
     
     def stop(self, metric: Optional[PerformanceMetric] = None):
@@ -93,10 +117,13 @@ class PerformanceMonitor:
             return
 
         if metric is None:
-            metric = self.current_metric
+            with self._lock:
+                metric = self.current_metric
 
         if metric:
-            metric.stop(end_memory_mb=self._get_memory_mb())
+            # Metrics started without memory tracking skip the sample
+            end_memory_mb = self._get_memory_mb() if metric.start_memory_mb is not None else None
+            metric.stop(end_memory_mb=end_memory_mb)
     
     def get_summary(self) -> Dict:
         """
@@ -105,18 +132,21 @@ class PerformanceMonitor:
         Returns:
             Dictionary with performance statistics
         """
-        if not self.metrics:
+        with self._lock:
+            metrics = list(self.metrics)
+
+        if not metrics:
             return {}
 
-        total_time = sum(m.duration for m in self.metrics if m.duration)
+        total_time = sum(m.duration for m in metrics if m.duration)
 
         # Get memory stats
-        memory_deltas = [m.memory_delta_mb for m in self.metrics if m.memory_delta_mb is not None]
-        peak_memory = max((m.end_memory_mb for m in self.metrics if m.end_memory_mb), default=0)
+        memory_deltas = [m.memory_delta_mb for m in metrics if m.memory_delta_mb is not None]
+        peak_memory = max((m.end_memory_mb for m in metrics if m.end_memory_mb), default=0)
 
         # Group by operation name
         by_name = {}
-        for metric in self.metrics:
+        for metric in metrics:
             if metric.duration:
                 if metric.name not in by_name:
                     by_name[metric.name] = {
@@ -147,7 +177,7 @@ class PerformanceMonitor:
 
         return {
             "total_time": total_time,
-            "total_operations": len(self.metrics),
+            "total_operations": len(metrics),
             "peak_memory_mb": peak_memory,
             "total_memory_delta_mb": sum(memory_deltas) if memory_deltas else 0,
             "by_operation": stats
@@ -165,86 +195,101 @@ class PerformanceMonitor:
             filename = f"performance_report_{timestamp}.txt"
 
         summary = self.get_summary()
+        with self._lock:
+            metrics = list(self.metrics)
+
+        # Build the whole report, then write it in one call
+        parts = [
+            "="*70,
+            "PERFORMANCE REPORT",
+            "="*70,
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            ""
+        ]
+
+        # Configuration
+        if self.config:
+            parts.append("CONFIGURATION:")
+            parts.append("-"*70)
+            for key, value in self.config.items():
+                parts.append(f"  {key}: {value}")
+            parts.append("")
+
+        # Summary
+        parts.extend([
+            "SUMMARY:",
+            "-"*70,
+            f"Total Time: {summary['total_time']:.3f}s",
+            f"Total Operations: {summary['total_operations']}",
+            f"Peak Memory: {summary['peak_memory_mb']:.1f} MB",
+            f"Total Memory Delta: {summary['total_memory_delta_mb']:+.1f} MB",
+            ""
+        ])
+
+        # By Operation
+        parts.append("BY OPERATION:")
+        parts.append("-"*70)
+        for name, stats in summary['by_operation'].items():
+            parts.extend([
+                f"\n  {name}:",
+                f"    Count: {stats['count']}",
+                f"    Total Time: {stats['total_time']:.3f}s",
+                f"    Average Time: {stats['avg_time']:.3f}s",
+                f"    Min Time: {stats['min_time']:.3f}s",
+                f"    Max Time: {stats['max_time']:.3f}s"
+            ])
+            if 'avg_memory_delta_mb' in stats:
+                parts.append(f"    Avg Memory Delta: {stats['avg_memory_delta_mb']:+.1f} MB")
+                parts.append(f"    Max Memory Delta: {stats['max_memory_delta_mb']:+.1f} MB")
+
+        parts.append("")
+
+        # Timeline
+        parts.append("TIMELINE:")
+        parts.append("-"*70)
+        line = "{:3d}. {:40s} {:>10s}{}{}".format
+        for i, metric in enumerate(metrics, 1):
+            duration_str = f"{metric.duration:.3f}s" if metric.duration else "In progress"
+            mem_str = f" | Δmem: {metric.memory_delta_mb:+.1f}MB" if metric.memory_delta_mb else ""
+            metadata_str = ""
+            if metric.metadata:
+                metadata_str = " | " + ", ".join(f"{k}={v}" for k, v in metric.metadata.items())
+            parts.append(line(i, metric.name, duration_str, mem_str, metadata_str))
+
+        parts.append("="*70)
 
-        with open(filename, 'w') as f:
-            f.write("="*70 + "\n")
-            f.write("PERFORMANCE REPORT\n")
-            f.write("="*70 + "\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("\n")
-
-            # Configuration
-            if self.config:
-                f.write("CONFIGURATION:\n")
-                f.write("-"*70 + "\n")
-                for key, value in self.config.items():
-                    f.write(f"  {key}: {value}\n")
-                f.write("\n")
-
-            # Summary
-            f.write("SUMMARY:\n")
-            f.write("-"*70 + "\n")
-            f.write(f"Total Time: {summary['total_time']:.3f}s\n")
-            f.write(f"Total Operations: {summary['total_operations']}\n")
-            f.write(f"Peak Memory: {summary['peak_memory_mb']:.1f} MB\n")
-            f.write(f"Total Memory Delta: {summary['total_memory_delta_mb']:+.1f} MB\n")
-            f.write("\n")
-
-            # By Operation
-            f.write("BY OPERATION:\n")
-            f.write("-"*70 + "\n")
-            for name, stats in summary['by_operation'].items():
-                f.write(f"\n  {name}:\n")
-                f.write(f"    Count: {stats['count']}\n")
-                f.write(f"    Total Time: {stats['total_time']:.3f}s\n")
-                f.write(f"    Average Time: {stats['avg_time']:.3f}s\n")
-                f.write(f"    Min Time: {stats['min_time']:.3f}s\n")
-                f.write(f"    Max Time: {stats['max_time']:.3f}s\n")
-                if 'avg_memory_delta_mb' in stats:
-                    f.write(f"    Avg Memory Delta: {stats['avg_memory_delta_mb']:+.1f} MB\n")
-                    f.write(f"    Max Memory Delta: {stats['max_memory_delta_mb']:+.1f} MB\n")
-
-            f.write("\n")
-
-            # Timeline
-            f.write("TIMELINE:\n")
-            f.write("-"*70 + "\n")
-            for i, metric in enumerate(self.metrics, 1):
-                duration_str = f"{metric.duration:.3f}s" if metric.duration else "In progress"
-                mem_str = f" | Δmem: {metric.memory_delta_mb:+.1f}MB" if metric.memory_delta_mb else ""
-                metadata_str = ""
-                if metric.metadata:
-                    metadata_str = " | " + ", ".join(f"{k}={v}" for k, v in metric.metadata.items())
-                f.write(f"{i:3d}. {metric.name:40s} {duration_str:>10s}{mem_str}{metadata_str}\n")
-
-            f.write("="*70 + "\n")
+        with open(filename, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write("\n".join(parts) + "\n")
 
         print(f"\nPerformance report saved to: {filename}")
         return filename
     
     def print_timeline(self):
         """Print a timeline of all operations."""
-        if not self.metrics:
+        with self._lock:
+            metrics = list(self.metrics)
+
+        if not metrics:
             print("No performance metrics collected")
             return
         
-        print("\n" + "="*70)
-        print("PERFORMANCE TIMELINE")
-        print("="*70)
+        lines = ["\n" + "="*70, "PERFORMANCE TIMELINE", "="*70]
         
-        for i, metric in enumerate(self.metrics, 1):
+        for i, metric in enumerate(metrics, 1):
             duration_str = f"{metric.duration:.3f}s" if metric.duration else "In progress"
             metadata_str = ""
             if metric.metadata:
                 metadata_str = " | " + ", ".join(f"{k}={v}" for k, v in metric.metadata.items())
-            print(f"{i:3d}. {metric.name:40s} {duration_str:>10s}{metadata_str}")
+            lines.append(f"{i:3d}. {metric.name:40s} {duration_str:>10s}{metadata_str}")
         
-        print("="*70)
+        lines.append("="*70)
+        print("\n".join(lines))
     
     def reset(self):
         """Reset all metrics."""
-        self.metrics.clear()
-        self.current_metric = None
+        with self._lock:
+            self.metrics.clear()
+            self.current_metric = None
 
 
 def timed(monitor: PerformanceMonitor, operation_name: Optional[str] = None):
@@ -2,22 +2,154 @@
 Property analysis logic for determining categorical vs unique properties.
 """
 
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional, TYPE_CHECKING
-from .enums import PropertyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, List, Optional, TYPE_CHECKING
+from .enums import PropertyType, classify_unique_ratios
 
 if TYPE_CHECKING:
     from .performance import PerformanceMonitor
 
 
+# Approximate distinct counting (HyperLogLog) for large high-cardinality
+# DataFrame columns: HLL_MIN_ROWS is the smallest column worth sketching,
+# HLL_SAMPLE_ROWS the prefix used to spot high-cardinality columns, and
+# HLL_MARGIN how far (relative) an estimate must sit from the 0.5 / 1.0
+# classification thresholds to be trusted (~3x the sketch's 1.6% error).
+HLL_PRECISION = 12
+HLL_MIN_ROWS = 50_000
+HLL_SAMPLE_ROWS = 10_000
+HLL_MARGIN = 0.05
+
+
+def _approx_nunique(series: pd.Series) -> int:
+    """
+    Estimate the number of distinct non-null values with HyperLogLog.
+
+    Values are hashed with pandas' vectorized hashing and folded into
+    2**HLL_PRECISION registers with numpy, so the sketch needs a few KB
+    instead of a hash table of every distinct value.
+
+    Args:
+        series: Column to count
+
+    Returns:
+        Estimated distinct count
+    """
+    hashes = pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy()
+    m = 1 << HLL_PRECISION
+
+    # Register index from the top bits, rank from the next 32 bits
+    # (position of the first set bit; 33 if all are zero)
+    index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+    rest = ((hashes >> np.uint64(32 - HLL_PRECISION)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    _, exponent = np.frexp(rest)
+    rank = (33 - exponent).astype(np.uint8)
+
+    registers = np.zeros(m, dtype=np.uint8)
+    np.maximum.at(registers, index, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    empty = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and empty:
+        # Small-range correction (linear counting)
+        estimate = m * np.log(m / empty)
+    return int(round(estimate))
+
+
+# Properties analyzed per stats query; bounds the number of DISTINCT sets
+# the server holds at once during the label scan
+STATS_BATCH_SIZE = 16
+
+
+def _build_stats_query(label: str, key_count: int) -> str:
+    """
+    Build a single-scan stats query for key_count properties.
+
+    Property keys are passed as parameters $k0..$kN, so the query text
+    only depends on the label and batch size and its plan is reused.
+    Per key i the query returns u{i} (distinct values), nn{i} (non-null
+    values) and t{i} (PropertyType name, same thresholds as
+    PropertyType.from_unique_ratio), plus the label total.
+    """
+    aggregates = []
+    columns = []
+    for i in range(key_count):
+        aggregates.append(f"count(DISTINCT n[$k{i}]) AS u{i}, count(n[$k{i}]) AS nn{i}")
+        columns.append(
+            f"u{i}, nn{i}, "
+            f"CASE WHEN total = 0 THEN 'HIGHLY_CATEGORICAL' "
+            f"WHEN u{i} = total THEN 'UNIQUE' "
+            f"WHEN 1.0 * u{i} / total < 0.05 THEN 'HIGHLY_CATEGORICAL' "
+            f"WHEN 1.0 * u{i} / total < 0.5 THEN 'CATEGORICAL' "
+            f"ELSE 'SEMI_UNIQUE' END AS t{i}"
+        )
+    return (
+        f"MATCH (n:{label}) "
+        f"WITH count(n) AS total, {', '.join(aggregates)} "
+        f"RETURN total, {', '.join(columns)}"
+    )
+
+
 class PropertyAnalyzer:
-    """Analyzes properties to determine if they are categorical or unique."""
+    """
+    Analyzes properties to determine if they are categorical or unique.
+
+    Used as a context manager, the analyzer opens one session on its driver
+    on first use and reuses it for every Cypher query until exit. Outside
+    a ``with`` block (or for a different driver/database) each call opens
+    its own session. A shared session is not thread-safe, so parallel work
+    in analyze_properties_cypher always uses per-worker sessions.
+    """
+
+    def __init__(self, driver=None, database: Optional[str] = None):
+        """
+        Initialize the property analyzer.
+
+        Args:
+            driver: Neo4j driver whose session is shared while entered
+            database: Database of the shared session (None for the server default)
+        """
+        self._driver = driver
+        self._database = database
+        self._session = None
+        self._entered = False
+
+    def __enter__(self):
+        """Context manager entry."""
+        self._entered = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit: close the shared session, if one was opened."""
+        self._entered = False
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    @contextmanager
+    def _open_session(self, driver, database: Optional[str]):
+        """Yield the shared session when possible, otherwise a new one."""
+        if self._entered and driver is self._driver and database == self._database:
+            if self._session is None:
+                self._session = driver.session(database=database)
+            yield self._session
+        else:
+            with driver.session(database=database) as session:
+                yield session
 
     @staticmethod
     def analyze_dataframe(df: pd.DataFrame, performance_monitor: Optional['PerformanceMonitor'] = None) -> Dict[str, Dict]:
         """
         Analyze properties in a DataFrame.
 
+        For large frames, unique_values of clearly SEMI_UNIQUE columns is a
+        HyperLogLog estimate (within a few percent); all other counts are
+        exact.
+
         Args:
             df: DataFrame containing node properties
             performance_monitor: Optional performance monitor for tracking
@@ -28,21 +160,47 @@ class PropertyAnalyzer:
         if df.empty:
             return {}
 
-        summary = {}
-        total_nodes = len(df)
+        metric = None
+        if performance_monitor:
+            metric = performance_monitor.start("analyze_columns", columns=len(df.columns))
 
-        for column in df.columns:
-            # Track analysis per column
-            metric = None
-            if performance_monitor:
-                metric = performance_monitor.start("analyze_column", column=column)
+        try:
+            summary = {}
+            total_nodes = len(df)
 
-            try:
-                unique_count = df[column].nunique()
-                unique_ratio = unique_count / total_nodes
+            null_counts = df.isna().sum()
+
+            # Large columns that look high-cardinality in a prefix sample are
+            # estimated with HyperLogLog; the estimate is kept only when it is
+            # clearly SEMI_UNIQUE, everything else is counted exactly
+            approx_counts = {}
+            if total_nodes >= HLL_MIN_ROWS:
+                sample = df.head(HLL_SAMPLE_ROWS)
+                sample_ratios = sample.nunique(dropna=True) / len(sample)
+                for column in sample_ratios.index[sample_ratios > 0.5]:
+                    try:
+                        estimate = _approx_nunique(df[column])
+                    except TypeError:
+                        # Unhashable values (e.g. lists); leave to nunique
+                        continue
+                    ratio = estimate / total_nodes
+                    if 0.5 * (1 + HLL_MARGIN) < ratio < 1 - HLL_MARGIN:
+                        approx_counts[column] = estimate
+
+            # One pass over the whole frame for each statistic instead of
+            # one per column
+            exact_columns = [column for column in df.columns if column not in approx_counts]
+            unique_counts = df[exact_columns].nunique(dropna=True)
 
-                # Determine property type
-                prop_type = PropertyType.from_unique_ratio(unique_ratio)
+            counts = [
+                approx_counts[column] if column in approx_counts else int(unique_counts[column])
+                for column in df.columns
+            ]
+            # Classify every column in one vectorized step
+            prop_types = classify_unique_ratios([count / total_nodes for count in counts])
+
+            for column, unique_count, prop_type in zip(df.columns, counts, prop_types):
+                unique_ratio = unique_count / total_nodes
 
                 # Get sample values for categorical properties
                 sample_values = None
@@ -55,101 +213,280 @@ class PropertyAnalyzer:
                     "total_values": total_nodes,
                     "unique_ratio": unique_ratio,
                     "type": prop_type.value,
-                    "null_count": int(df[column].isna().sum()),
+                    "null_count": int(null_counts[column]),
                     "sample_categorical_values": sample_values
                 }
-            finally:
-                if performance_monitor and metric:
-                    performance_monitor.stop(metric)
+        finally:
+            if performance_monitor and metric:
+                performance_monitor.stop(metric)
 
         return summary
     
-    @staticmethod
     def get_property_stats_cypher(
+        self,
         driver,
         label: str,
         prop_key: str,
         total_count: int,
-        performance_monitor: Optional['PerformanceMonitor'] = None
+        performance_monitor: Optional['PerformanceMonitor'] = None,
+        database: Optional[str] = None
     ) -> Dict:
         """
         Get property statistics using Cypher aggregations (optimized).
 
+        Single-property wrapper around get_properties_stats_cypher.
+
         Args:
             driver: Neo4j driver instance
             label: Node label
             prop_key: Property key to analyze
-            total_count: Total number of nodes with this label
+            total_count: Total number of nodes with this label (unused; the
+                total is computed by the stats query itself)
             performance_monitor: Optional performance monitor for tracking
+            database: Database to query (None for the server default)
 
         Returns:
             Dictionary with property statistics
         """
-        with driver.session() as session:
-            # Track stats query
+        return self.get_properties_stats_cypher(
+            driver,
+            label,
+            [prop_key],
+            performance_monitor=performance_monitor,
+            database=database
+        )[prop_key]
+
+    def analyze_properties_cypher(
+        self,
+        driver,
+        label: str,
+        prop_keys: List[str],
+        max_workers: int = 8,
+        performance_monitor: Optional['PerformanceMonitor'] = None,
+        database: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        Get statistics for many properties using parallel batched queries.
+
+        The keys are split into up to max_workers chunks. Each chunk runs
+        get_properties_stats_cypher in its own session on a thread pool
+        sharing the driver, so the server can scan the label for several
+        chunks concurrently. With a single chunk the query runs on the
+        calling thread (using the shared session, if any).
+
+        Args:
+            driver: Neo4j driver instance (its pool should fit max_workers sessions)
+            label: Node label
+            prop_keys: Property keys to analyze
+            max_workers: Maximum number of concurrent queries
+            performance_monitor: Optional performance monitor for tracking
+                (shared by the worker threads)
+            database: Database to query (None for the server default)
+
+        Returns:
+            Dictionary of {property: statistics} in the order of prop_keys
+        """
+        if not prop_keys:
+            return {}
+
+        workers = max(1, min(max_workers, len(prop_keys)))
+        chunks = [prop_keys[i::workers] for i in range(workers)]
+        print(f"  Analyzing {len(prop_keys)} properties with {workers} worker(s)...")
+
+        if workers == 1:
+            return self.get_properties_stats_cypher(
+                driver,
+                label,
+                prop_keys,
+                performance_monitor=performance_monitor,
+                database=database
+            )
+
+        merged = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    # Fresh analyzer per task: sessions can't cross threads
+                    PropertyAnalyzer().get_properties_stats_cypher,
+                    driver,
+                    label,
+                    chunk,
+                    performance_monitor=performance_monitor,
+                    database=database
+                )
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                merged.update(future.result())
+
+        # Preserve the original property order
+        return {key: merged[key] for key in prop_keys if key in merged}
+
+    def get_properties_stats_cypher(
+        self,
+        driver,
+        label: str,
+        prop_keys: List[str],
+        performance_monitor: Optional['PerformanceMonitor'] = None,
+        database: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """
+        Get statistics for several properties with one label scan per batch.
+
+        Batched variant of get_property_stats_cypher: keys are analyzed in
+        groups of STATS_BATCH_SIZE, each group as one query with a
+        count/count(DISTINCT) column per key (see _build_stats_query). The
+        label total comes from the same scan, and the property type is
+        classified server-side. Each query runs as a read transaction
+        function, so it is routed to a reader and retried on transient
+        errors.
+
+        Args:
+            driver: Neo4j driver instance
+            label: Node label
+            prop_keys: Property keys to analyze
+            performance_monitor: Optional performance monitor for tracking
+            database: Database to query (None for the server default)
+
+        Returns:
+            Dictionary of {property: statistics}
+        """
+        if not prop_keys:
+            return {}
+
+        with self._open_session(driver, database) as session:
             stats_metric = None
             if performance_monitor:
-                stats_metric = performance_monitor.start("cypher_stats_query", label=label, property=prop_key)
+                stats_metric = performance_monitor.start("cypher_stats_query", label=label, properties=len(prop_keys))
+
+            def _read_stats(tx, batch):
+                # Columns are total, then (u, nn, t) per key: read them
+                # positionally instead of by name
+                total, *columns = tx.run(
+                    _build_stats_query(label, len(batch)),
+                    {f"k{i}": key for i, key in enumerate(batch)}
+                ).single(strict=True).values()
+                return {
+                    key: {
+                        "total": total,
+                        "non_null": columns[3 * i + 1],
+                        "unique_count": columns[3 * i],
+                        "type": columns[3 * i + 2]
+                    }
+                    for i, key in enumerate(batch)
+                }
 
             try:
-                # Optimized: Get stats and determine if we need categorical samples in one pass
-                stats_query = f"""
-                MATCH (n:{label})
-                WITH count(n) as total,
-                     count(DISTINCT n.`{prop_key}`) as unique_count,
-                     count(n) - count(n.`{prop_key}`) as null_count
-                RETURN total, unique_count, null_count,
-                       toFloat(unique_count) / toFloat(total) as unique_ratio
-                """
-
-                result = session.run(stats_query)
-                stats = result.single()
-
-                unique_count = stats["unique_count"]
-                null_count = stats["null_count"]
-                total = stats["total"]
-                unique_ratio = stats["unique_ratio"]
+                rows = {}
+                for start in range(0, len(prop_keys), STATS_BATCH_SIZE):
+                    batch = prop_keys[start:start + STATS_BATCH_SIZE]
+                    rows.update(session.execute_read(_read_stats, batch))
             finally:
                 if performance_monitor and stats_metric:
                     performance_monitor.stop(stats_metric)
 
-            # Determine property type
-            prop_type = PropertyType.from_unique_ratio(unique_ratio)
+            summary = {}
+            categorical_keys = []
+            for prop_key in prop_keys:
+                row = rows[prop_key]
+                total = row["total"]
+                unique_count = row["unique_count"]
+                null_count = total - row["non_null"]
+                unique_ratio = unique_count / total if total else 0.0
+
+                prop_type = PropertyType[row["type"]]
+                if prop_type in [PropertyType.CATEGORICAL, PropertyType.HIGHLY_CATEGORICAL]:
+                    categorical_keys.append(prop_key)
+
+                summary[prop_key] = {
+                    "unique_values": unique_count,
+                    "total_values": total,
+                    "unique_ratio": unique_ratio,
+                    "type": prop_type.value,
+                    "null_count": null_count,
+                    "sample_categorical_values": None
+                }
 
-            # Get sample categorical values ONLY if categorical
-            # This avoids the second query for UNIQUE and SEMI_UNIQUE properties
-            sample_values = None
-            if prop_type in [PropertyType.CATEGORICAL, PropertyType.HIGHLY_CATEGORICAL]:
-                # Track categorical sample query
+            # Top values for all categorical properties in one more scan
+            if categorical_keys:
                 sample_metric = None
                 if performance_monitor:
-                    sample_metric = performance_monitor.start("cypher_categorical_query", label=label, property=prop_key)
+                    sample_metric = performance_monitor.start("cypher_categorical_query", label=label, properties=len(categorical_keys))
 
                 try:
-                    # Optimized query with aggregation first
                     sample_query = f"""
                     MATCH (n:{label})
-                    WHERE n.`{prop_key}` IS NOT NULL
-                    WITH n.`{prop_key}` as value, count(*) as count
+                    UNWIND $keys AS key
+                    WITH key, n[key] AS value
+                    WHERE value IS NOT NULL
+                    WITH key, value, count(*) AS count
                     ORDER BY count DESC
-                    LIMIT 10
-                    RETURN value, count
+                    WITH key, collect({{value: value, count: count}})[..$top_k] AS top_values
+                    RETURN key, top_values
                     """
-                    sample_result = session.run(sample_query)
-                    sample_values = {
-                        record["value"]: record["count"]
-                        for record in sample_result
-                    }
+
+                    def _read_samples(tx):
+                        return tx.run(sample_query, keys=categorical_keys, top_k=10).values()
+
+                    for key, top_values in session.execute_read(_read_samples):
+                        summary[key]["sample_categorical_values"] = {
+                            item["value"]: item["count"]
+                            for item in top_values
+                        }
                 finally:
                     if performance_monitor and sample_metric:
                         performance_monitor.stop(sample_metric)
 
-            return {
-                "unique_values": unique_count,
-                "total_values": total,
-                "unique_ratio": unique_ratio,
-                "type": prop_type.value,
-                "null_count": null_count,
-                "sample_categorical_values": sample_values
-            }
+            return summary
+
+    def get_value_histograms_cypher(
+        self,
+        driver,
+        label: str,
+        prop_keys: List[str],
+        top_k: int = 20,
+        performance_monitor: Optional['PerformanceMonitor'] = None,
+        database: Optional[str] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Get the most frequent values of several properties in a single label scan.
+
+        Args:
+            driver: Neo4j driver instance
+            label: Node label
+            prop_keys: Property keys to build histograms for
+            top_k: Number of values to keep per property
+            performance_monitor: Optional performance monitor for tracking
+            database: Database to query (None for the server default)
+
+        Returns:
+            Dictionary of {property: [{"value": ..., "count": ...}, ...]},
+            most frequent first
+        """
+        if not prop_keys:
+            return {}
+
+        metric = None
+        if performance_monitor:
+            metric = performance_monitor.start("cypher_histogram_query", label=label, properties=len(prop_keys))
+
+        try:
+            histogram_query = f"""
+            MATCH (n:{label})
+            UNWIND $keys AS key
+            WITH key, n[key] AS value
+            WHERE value IS NOT NULL
+            WITH key, value, count(*) AS count
+            ORDER BY count DESC
+            WITH key, collect({{value: value, count: count}})[..$top_k] AS top_values
+            RETURN key, top_values
+            """
+
+            def _read_histograms(tx):
+                return dict(tx.run(histogram_query, keys=prop_keys, top_k=top_k).values())
 
+            with self._open_session(driver, database) as session:
+                return session.execute_read(_read_histograms)
+        finally:
+            if performance_monitor and metric:
+                performance_monitor.stop(metric)
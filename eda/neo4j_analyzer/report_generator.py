@@ -3,10 +3,59 @@ Report generation for property analysis.
 """
 
 import pandas as pd
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+from jinja2 import Template
 from ydata_profiling import ProfileReport
 
 
+# Template for reports built from Cypher aggregates (no DataFrame involved)
+_CYPHER_REPORT_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Property Analysis for {{ label }} Nodes</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }
+th { background: #f0f0f0; }
+.bar { background: #4a90d9; height: 12px; }
+</style>
+</head>
+<body>
+<h1>Property Analysis for {{ label }} Nodes</h1>
+<h2>Overview</h2>
+<table>
+<tr><th>Property</th><th>Type</th><th>Unique values</th><th>Unique ratio</th><th>Null count</th></tr>
+{% for name, info in summary.items() %}
+<tr>
+<td><a href="#{{ name }}">{{ name }}</a></td>
+<td>{{ info.type }}</td>
+<td>{{ "{:,}".format(info.unique_values) }}</td>
+<td>{{ "{:.2%}".format(info.unique_ratio) }}</td>
+<td>{{ "{:,}".format(info.null_count) }}</td>
+</tr>
+{% endfor %}
+</table>
+{% for name, values in histograms.items() if values %}
+<h2 id="{{ name }}">{{ name }}</h2>
+<table>
+<tr><th>Value</th><th>Count</th><th></th></tr>
+{% set max_count = values[0]["count"] %}
+{% for item in values %}
+<tr>
+<td>{{ item["value"] }}</td>
+<td>{{ "{:,}".format(item["count"]) }}</td>
+<td><div class="bar" style="width: {{ (200 * item["count"] / max_count) | round | int }}px"></div></td>
+</tr>
+{% endfor %}
+</table>
+{% endfor %}
+</body>
+</html>
+""", autoescape=True)
+
+
 class ReportGenerator:
     """Generates analysis reports."""
     
@@ -48,6 +97,41 @@ class ReportGenerator:
         
         return profile
     
+    @staticmethod
+    def generate_cypher_report(
+        summary: Dict[str, Dict],
+        histograms: Dict[str, List[Dict]],
+        label: str,
+        output_html: Optional[str] = None
+    ) -> str:
+        """
+        Render an HTML report from a property summary and value histograms.
+        
+        Lightweight alternative to generate_profiling_report for summaries
+        computed with Cypher aggregations.
+        
+        Args:
+            summary: Property analysis summary dictionary
+            histograms: Top values per property, most frequent first
+            label: Label name for the report title
+            output_html: Optional path to save HTML report
+            
+        Returns:
+            Rendered HTML
+        """
+        html = _CYPHER_REPORT_TEMPLATE.render(
+            label=label,
+            summary=summary,
+            histograms=histograms
+        )
+        
+        if output_html:
+            with open(output_html, 'w', encoding='utf-8') as f:
+                f.write(html)
+            print(f"Report saved to: {output_html}")
+        
+        return html
+    
     @staticmethod
     def print_summary(summary: Dict[str, Dict], label: str):
         """
@@ -57,20 +141,20 @@ class ReportGenerator:
             summary: Property analysis summary dictionary
             label: Node label being analyzed
         """
-        print(f"\n{'='*60}")
-        print(f"Property Summary for: {label}")
-        print(f"{'='*60}")
+        lines = [f"\n{'='*60}", f"Property Summary for: {label}", f"{'='*60}"]
         
         for prop_name, prop_info in summary.items():
-            print(f"\n  📊 {prop_name}:")
-            print(f"    Type: {prop_info['type']}")
-            print(f"    Unique values: {prop_info['unique_values']:,}")
-            print(f"    Unique ratio: {prop_info['unique_ratio']:.2%}")
-            print(f"    Null count: {prop_info['null_count']:,}")
+            lines.append(f"\n  📊 {prop_name}:")
+            lines.append(f"    Type: {prop_info['type']}")
+            lines.append(f"    Unique values: {prop_info['unique_values']:,}")
+            lines.append(f"    Unique ratio: {prop_info['unique_ratio']:.2%}")
+            lines.append(f"    Null count: {prop_info['null_count']:,}")
             
             # Display sample categorical values if available
             if prop_info.get('sample_categorical_values'):
-                print(f"    Sample categorical values (with counts):")
+                lines.append(f"    Sample categorical values (with counts):")
                 for value, count in prop_info['sample_categorical_values'].items():
-                    print(f"      - {value}: {count:,}")
-
+                    lines.append(f"      - {value}: {count:,}")
+        
+        # One write for the whole summary
+        print("\n".join(lines))
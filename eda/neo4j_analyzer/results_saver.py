@@ -3,10 +3,59 @@ Save and load EDA analysis results.
 """
 
 import json
+import os
+import re
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib json module
+    orjson = None
+
+
+# Auto-generated results filenames: eda_results_YYYYMMDD_HHMMSS.json
+_RESULTS_NAME_RE = re.compile(r"^eda_results_(\d{8}_\d{6})\.json$")
+
+
+class _IndexedResults(dict):
+    """
+    Results dictionary returned by load_analysis_results.
+
+    Carries the property names of each label grouped by type, built once
+    from the file as loaded, so the getters are lookups.
+    """
+
+    def __init__(self, results: Dict[str, Dict]):
+        super().__init__(results)
+        self.type_index = {
+            node_label: ResultsSaver._group_by_type(properties)
+            for node_label, properties in self.items()
+        }
+
+
+def _default(o: Any) -> Any:
+    """Convert a value the JSON encoder can't handle natively."""
+    if hasattr(o, 'isoformat'):  # DateTime objects
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if hasattr(o, '__dict__'):  # Custom objects
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class _ResultsEncoder(json.JSONEncoder):
+    """JSON encoder that converts non-serializable values while dumping."""
+
+    def default(self, o: Any) -> Any:
+        return _default(o)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
 
 class ResultsSaver:
     """Saves and loads EDA analysis results."""
@@ -33,6 +82,52 @@ class ResultsSaver:
         else:
             return obj
 
+    @staticmethod
+    def _group_by_type(properties: Dict[str, Dict]) -> Dict[str, Tuple[str, ...]]:
+        """
+        Group a label's property names by type.
+
+        Args:
+            properties: Property results of one node label
+
+        Returns:
+            Dictionary of {type name: property names in results order}
+        """
+        grouped: Dict[str, List[str]] = {}
+        for prop_name, prop_info in properties.items():
+            grouped.setdefault(prop_info.get('type', ''), []).append(prop_name)
+        return {prop_type: tuple(names) for prop_type, names in grouped.items()}
+
+    @staticmethod
+    def _type_index(results: Dict[str, Dict], node_label: str) -> Dict[str, Tuple[str, ...]]:
+        """
+        Get the property names of a label grouped by type.
+
+        Loaded results carry the index built at load time; any other
+        results dictionary is grouped on the spot.
+
+        Args:
+            results: EDA results dictionary
+            node_label: Node label to look up
+
+        Returns:
+            Dictionary of {type name: property names in results order}
+        """
+        if isinstance(results, _IndexedResults):
+            return results.type_index[node_label]
+        return ResultsSaver._group_by_type(results[node_label])
+
+    @staticmethod
+    def _select_types(results: Dict[str, Dict], node_label: str, types: Tuple[str, ...]) -> List[str]:
+        """Return the label's properties whose type is in types, in results order."""
+        label_index = ResultsSaver._type_index(results, node_label)
+        if len(types) == 1:
+            return list(label_index.get(types[0], ()))
+        selected = set()
+        for prop_type in types:
+            selected.update(label_index.get(prop_type, ()))
+        return [name for name in results[node_label] if name in selected]
+
     @staticmethod
     def save_analysis_results(
         results: Dict[str, Dict],
@@ -58,7 +153,7 @@ class ResultsSaver:
         
         output_path = Path(output_dir) / filename
 
-        # Prepare data structure and convert to serializable format
+        # Prepare data structure
         data = {
             "metadata": {
                 "timestamp": datetime.now().isoformat(),
@@ -67,12 +162,33 @@ class ResultsSaver:
             "results": results
         }
 
-        # Convert to serializable format
-        serializable_data = ResultsSaver._convert_to_serializable(data)
-
-        # Save to JSON
+        # Save to JSON, converting values on the fly instead of building a
+        # converted copy of the results first
+        if orjson is not None:
+            try:
+                payload = orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+            except TypeError:
+                # A key orjson can't stringify; convert everything up front
+                payload = orjson.dumps(
+                    ResultsSaver._convert_to_serializable(data),
+                    default=_default,
+                    option=_ORJSON_OPTIONS
+                )
+            with open(output_path, 'wb') as f:
+                f.write(payload)
+            
+            print(f"\nEDA results saved to: {output_path}")
+            return str(output_path)
+        
         with open(output_path, 'w') as f:
-            json.dump(serializable_data, f, indent=2)
+            try:
+                json.dump(data, f, cls=_ResultsEncoder, indent=2)
+            except TypeError:
+                # Dict keys never reach the encoder; fall back to a full
+                # conversion when one isn't a JSON key type
+                f.seek(0)
+                f.truncate()
+                json.dump(ResultsSaver._convert_to_serializable(data), f, indent=2)
         
         print(f"\nEDA results saved to: {output_path}")
         return str(output_path)
@@ -88,8 +204,15 @@ class ResultsSaver:
         Returns:
             Dictionary with metadata and results
         """
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        if orjson is not None:
+            with open(filepath, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filepath, 'r') as f:
+                data = json.load(f)
+        
+        # Index property types up front so the getters are lookups
+        data["results"] = _IndexedResults(data.get("results", {}))
         
         return data
     
@@ -113,18 +236,8 @@ class ResultsSaver:
         if node_label not in results:
             return []
         
-        identifiers = []
-        properties = results[node_label]
-        
-        for prop_name, prop_info in properties.items():
-            prop_type = prop_info.get('type', '')
-            
-            if prop_type == 'UNIQUE':
-                identifiers.append(prop_name)
-            elif include_semi_unique and prop_type == 'SEMI_UNIQUE':
-                identifiers.append(prop_name)
-        
-        return identifiers
+        types = ('UNIQUE', 'SEMI_UNIQUE') if include_semi_unique else ('UNIQUE',)
+        return ResultsSaver._select_types(results, node_label, types)
     
     @staticmethod
     def get_categorical_properties(
@@ -146,18 +259,8 @@ class ResultsSaver:
         if node_label not in results:
             return []
         
-        categorical = []
-        properties = results[node_label]
-        
-        for prop_name, prop_info in properties.items():
-            prop_type = prop_info.get('type', '')
-            
-            if prop_type == 'CATEGORICAL':
-                categorical.append(prop_name)
-            elif include_highly_categorical and prop_type == 'HIGHLY_CATEGORICAL':
-                categorical.append(prop_name)
-        
-        return categorical
+        types = ('CATEGORICAL', 'HIGHLY_CATEGORICAL') if include_highly_categorical else ('CATEGORICAL',)
+        return ResultsSaver._select_types(results, node_label, types)
     
     @staticmethod
     def find_latest_results(directory: str = ".") -> Optional[str]:
@@ -170,13 +273,30 @@ class ResultsSaver:
         Returns:
             Path to latest results file, or None if not found
         """
-        results_dir = Path(directory)
-        results_files = list(results_dir.glob("eda_results_*.json"))
+        named = []
+        other = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = entry.name
+                if not (name.startswith("eda_results_") and name.endswith(".json")):
+                    continue
+                if not entry.is_file():
+                    continue
+                match = _RESULTS_NAME_RE.match(name)
+                if match:
+                    named.append((match.group(1), entry))
+                else:
+                    other.append(entry)
         
-        if not results_files:
+        if not named and not other:
             return None
         
-        # Sort by modification time, most recent first
-        latest = max(results_files, key=lambda p: p.stat().st_mtime)
-        return str(latest)
-
+        # Auto-generated names sort chronologically, so no stat is needed
+        if not other:
+            return max(named, key=lambda item: item[0])[1].path
+        
+        # Otherwise compare by modification time, most recent first
+        # (DirEntry.stat reuses what the directory scan already read)
+        candidates = other + [entry for _, entry in named]
+        latest = max(candidates, key=lambda entry: entry.stat().st_mtime)
+        return latest.path
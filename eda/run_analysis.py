@@ -4,6 +4,8 @@ Main entry point for Neo4j property analysis.
 This script demonstrates how to use the refactored Neo4jPropertyAnalyzer package.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 from neo4j_analyzer import Neo4jPropertyAnalyzer
 from neo4j_analyzer.report_generator import ReportGenerator
 from neo4j_analyzer.performance import PerformanceMonitor
@@ -23,6 +25,7 @@ def main():
     SAMPLE_SIZE = 50000   # Sample size for standard mode (None for all)
     FETCH_SIZE = 2000     # Batch size for data extraction
     ENABLE_PERFORMANCE_TRACKING = True  # Enable performance metrics
+    LABEL_WORKERS = 8     # Labels analyzed concurrently in fast mode
 
     # Initialize performance monitor
     perf_monitor = PerformanceMonitor() if ENABLE_PERFORMANCE_TRACKING else None
@@ -53,37 +56,46 @@ def main():
         labels = analyzer.get_node_labels()
         print(f"Found node labels: {labels}")
 
-        # Analyze each label
-        for label in labels:
-            print(f"\n{'='*60}")
-            print(f"Analyzing label: {label}")
-            print(f"{'='*60}")
-
+        def analyze_label(label):
             # Choose analysis mode
             if USE_FAST_MODE:
                 # Fast mode: Cypher aggregations, minimal memory
-                summary = analyzer.get_property_summary_fast(label)
-            else:
-                # Standard mode: DataFrame analysis
-                summary = analyzer.get_property_summary(
-                    label,
-                    sample_size=SAMPLE_SIZE
-                )
-
-            # Store results
-            all_results[label] = summary
-
-            # Print summary
-            ReportGenerator.print_summary(summary, label)
-
-            # Optional: Generate HTML report (only in standard mode)
-            # if not USE_FAST_MODE:
-            #     analyzer.analyze_properties(
-            #         label,
-            #         output_html=f"{label}_profile.html",
-            #         sample_size=SAMPLE_SIZE,
-            #         minimal=True
-            #     )
+                return analyzer.get_property_summary_fast(label)
+            # Standard mode: DataFrame analysis
+            return analyzer.get_property_summary(
+                label,
+                sample_size=SAMPLE_SIZE
+            )
+
+        # Analyze labels concurrently: each call opens its own sessions on
+        # the shared (thread-safe) driver, and the run is bound by Bolt
+        # round-trips. Standard mode stays serial to bound DataFrame memory.
+        workers = LABEL_WORKERS if USE_FAST_MODE else 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(label, executor.submit(analyze_label, label)) for label in labels]
+
+            # Collect in label order so the printed summaries stay stable
+            for label, future in futures:
+                summary = future.result()
+
+                # Store results
+                all_results[label] = summary
+
+                print(f"\n{'='*60}")
+                print(f"Analyzing label: {label}")
+                print(f"{'='*60}")
+
+                # Print summary
+                ReportGenerator.print_summary(summary, label)
+
+                # Optional: Generate HTML report (only in standard mode)
+                # if not USE_FAST_MODE:
+                #     analyzer.analyze_properties(
+                #         label,
+                #         output_html=f"{label}_profile.html",
+                #         sample_size=SAMPLE_SIZE,
+                #         minimal=True
+                #     )
 
     finally:
         analyzer.close()
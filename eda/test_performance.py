@@ -4,6 +4,7 @@ Quick test of performance monitoring with memory tracking.
 
 from neo4j_analyzer.performance import PerformanceMonitor
 import time
+import numpy as np
 
 def main():
     monitor = PerformanceMonitor()
@@ -18,7 +19,7 @@ def main():
     metric1 = monitor.start("test_operation_1")
     time.sleep(0.1)
     # Allocate some memory
-    data = [i for i in range(100000)]
+    data = np.arange(100000, dtype=np.int64)
     monitor.stop(metric1)
     
     # Test operation 2
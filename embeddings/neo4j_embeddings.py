@@ -1,94 +1,246 @@
-from neo4j import GraphDatabase
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
 from neo4j.exceptions import Neo4jError
 
+from common import Neo4jConfig, get_driver
+
 URI = "bolt://44.204.34.69"
 AUTH = ("neo4j", "decibels-defenses-president")
 
 # Projected graph name in GDS
 GRAPH_NAME = "graph-with-component_ids"
+# Unfiltered projection that GRAPH_NAME is filtered from
+BASE_GRAPH_NAME = GRAPH_NAME + "-base"
 LABELS = ["Stream", "Game"]
 REL_TYPES = ["MODERATOR", "VIP", "CHATTER"]
 
+# Records pulled per round-trip; the KNN stream returns millions of pairs
+FETCH_SIZE = 10_000
+KNN_OUTPUT = "knn_results.txt"
+# Output lines joined per file write
+WRITE_BATCH = 8192
 
-def main() -> None:
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    with driver:
-        with driver.session() as session:
-            # Drop if exists to allow re-runs
-            session.run(
-                "CALL gds.graph.exists($name) YIELD exists "
-                "WITH exists WHERE exists "
-                "CALL gds.graph.drop($name) YIELD graphName "
-                "RETURN graphName",
-                name=GRAPH_NAME,
-            )
-
-            # Project filtered graph: only nodes with component_id_2
-            session.run(
-                """
-                CALL gds.graph.project.cypher(
-                  $name,
-                  'MATCH (n)
-                   WHERE n.component_id_2 IS NOT NULL
-                     AND any(l IN labels(n) WHERE l IN $labels)
-                   RETURN id(n) AS id, labels(n) AS labels',
-                  'MATCH (n)-[r]-(m)
-                   WHERE n.component_id_2 IS NOT NULL AND m.component_id_2 IS NOT NULL
-                     AND any(l IN labels(n) WHERE l IN $labels)
-                     AND any(l IN labels(m) WHERE l IN $labels)
-                     AND type(r) IN $rel_types
-                   RETURN id(n) AS source, id(m) AS target, type(r) AS type',
-                  { parameters: { rel_types: $rel_types, labels: $labels } }
-                )
-                """,
-                name=GRAPH_NAME,
-                rel_types=REL_TYPES,
-                labels=LABELS,
-            )
+# FastRP embeddings are written back to Stream nodes and reused by later
+# runs; set RECOMPUTE_EMBEDDINGS=1 to recompute them
+EMBEDDING_PROPERTY = "embedding"
+EMBEDDING_DIMENSION = 128
+RECOMPUTE_EMBEDDINGS = os.getenv("RECOMPUTE_EMBEDDINGS") == "1"
 
-            # Estimate memory before running FastRP + KNN
-            try:
-                est = session.run(
-                    "CALL gds.fastRP.mutate.estimate($name, { "
-                    "  nodeLabels: ['Stream'], "
-                    "  mutateProperty: 'embedding', "
-                    "  embeddingDimension: 128 "
-                    "}) "
-                    "YIELD nodeCount, relationshipCount, bytesMin, bytesMax, requiredMemory",
-                    name=GRAPH_NAME,
-                ).single()
-                if est:
-                    print(
-                        "FastRP estimate:",
-                        f"nodes={est['nodeCount']}",
-                        f"rels={est['relationshipCount']}",
-                        f"bytesMin={est['bytesMin']}",
-                        f"bytesMax={est['bytesMax']}",
-                        f"requiredMemory={est['requiredMemory']}",
-                    )
-            except Exception as e:
-                print("FastRP estimate failed:", e)
+# Set GDS_ESTIMATE=1 to print FastRP/KNN memory estimates first; they are
+# diagnostics only and cost an extra round-trip and plan each
+ESTIMATE_MEMORY = os.getenv("GDS_ESTIMATE") == "1"
+
+# Approximate KNN: sample half of the candidates per iteration and stop once
+# fewer than 0.1% of neighbours change. Concurrency is on the server, so it
+# is configured rather than taken from the local CPU count.
+KNN_CONFIG = {
+    "topK": 10,
+    "sampleRate": 0.5,
+    "deltaThreshold": 0.001,
+    "maxIterations": 100,
+    "concurrency": int(os.getenv("KNN_CONCURRENCY", "4")),
+    "nodeLabels": ["Stream"],
+    "nodeProperties": [EMBEDDING_PROPERTY],
+    # Pairs below the cutoff are pruned inside the algorithm and never
+    # streamed (0 keeps every positive pair)
+    "similarityCutoff": float(os.getenv("KNN_SIMILARITY_CUTOFF", "0")),
+}
+
+# Set KNN_TOP_PAIRS to keep only the globally most similar pairs; the
+# top-K is selected on the server so only those pairs cross the wire
+KNN_TOP_PAIRS = int(os.getenv("KNN_TOP_PAIRS", "0")) or None
 
-            # Compute FastRP embeddings in-memory (no DB write)
-            session.run(
-                "CALL gds.fastRP.mutate($name, { "
+
+def embeddings_persisted(tx) -> bool:
+    """Check whether every embedded Stream node already carries a written embedding.
+
+    FastRP only runs on the filtered graph, so only Streams with a
+    component_id_2 are embedded. Streams added there since the last run
+    have none yet, so partial coverage means recomputing.
+    """
+    return tx.run(
+        "RETURN EXISTS { MATCH (n:Stream) WHERE n.component_id_2 IS NOT NULL } "
+        "   AND NOT EXISTS { "
+        "     MATCH (n:Stream) "
+        "     WHERE n.component_id_2 IS NOT NULL AND n[$prop] IS NULL "
+        "   } AS persisted",
+        prop=EMBEDDING_PROPERTY,
+    ).single(strict=True)["persisted"]
+
+
+def write_knn_results(session, path: str, top_pairs=None) -> None:
+    """Stream KNN pairs for Stream nodes into a tab-separated file.
+
+    With top_pairs, only that many most similar pairs are written, most
+    similar first. Runs as an auto-commit query on the (write-mode)
+    session, so in a cluster it reaches the member holding the projection
+    and is never retried halfway through writing the file.
+    """
+    # Without top_pairs, rows are streamed as they are produced (no
+    # server-side ORDER BY, which would buffer and sort every pair first).
+    # Each node is resolved once, after the top-K cut, and projected to
+    # scalars only.
+    top_clause = (
+        "WITH node1, node2, similarity ORDER BY similarity DESC LIMIT $top_pairs "
+        if top_pairs else ""
+    )
+    result = session.run(
+        "CALL gds.knn.stream($name, $config) "
+        "YIELD node1, node2, similarity "
+        "WHERE similarity > 0 "
+        + top_clause +
+        "WITH gds.util.asNode(node1) AS n1, gds.util.asNode(node2) AS n2, similarity "
+        "RETURN n1.id AS node1_id, "
+        "       n2.id AS node2_id, "
+        "       similarity, "
+        "       n1.component_id_2 AS component_id_node_1, "
+        "       n2.component_id_2 AS component_id_node_2",
+        name=GRAPH_NAME,
+        config=KNN_CONFIG,
+        top_pairs=top_pairs,
+    )
+    # Rows are written as they arrive, joining WRITE_BATCH lines per write
+    # into a 1 MiB file buffer
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        lines = []
+        for node1_id, node2_id, similarity, component_1, component_2 in result:
+            lines.append(f"{node1_id}\t{node2_id}\t{similarity}"
+                         f"\t{component_1, component_2}\n")
+            if len(lines) >= WRITE_BATCH:
+                f.write("".join(lines))
+                lines.clear()
+        f.write("".join(lines))
+
+
+def project_graph(tx, with_embeddings: bool) -> None:
+    """Drop any previous projection and project the filtered graph.
+
+    With with_embeddings, the persisted Stream embeddings are loaded into
+    the projection as well.
+    """
+    for name in (GRAPH_NAME, BASE_GRAPH_NAME):
+        tx.run(
+            "CALL gds.graph.drop($name, false) YIELD graphName "
+            "RETURN graphName",
+            name=name,
+        ).consume()
+
+    # Native projection of the Stream/Game subgraph; nodes without a
+    # component_id_2 get the -1 default and are filtered out below
+    node_projection = {
+        label: {"properties": {"component_id_2": {"defaultValue": -1}}}
+        for label in LABELS
+    }
+    if with_embeddings:
+        # Streams outside the filtered graph have no embedding; the zero
+        # default only lets them load before the filter drops them
+        node_projection["Stream"]["properties"][EMBEDDING_PROPERTY] = {
+            "property": EMBEDDING_PROPERTY,
+            "defaultValue": [0.0] * EMBEDDING_DIMENSION,
+        }
+    rel_projection = {
+        rel_type: {"orientation": "UNDIRECTED"}
+        for rel_type in REL_TYPES
+    }
+    tx.run(
+        "CALL gds.graph.project($name, $nodes, $rels) "
+        "YIELD graphName RETURN graphName",
+        name=BASE_GRAPH_NAME,
+        nodes=node_projection,
+        rels=rel_projection,
+    ).consume()
+
+    # Keep only nodes with component_id_2 (and the relationships between them)
+    tx.run(
+        "CALL gds.graph.filter($name, $base, 'n.component_id_2 <> -1', '*') "
+        "YIELD graphName RETURN graphName",
+        name=GRAPH_NAME,
+        base=BASE_GRAPH_NAME,
+    ).consume()
+    tx.run(
+        "CALL gds.graph.drop($name) YIELD graphName "
+        "RETURN graphName",
+        name=BASE_GRAPH_NAME,
+    ).consume()
+
+
+def compute_embeddings(session) -> None:
+    """Compute FastRP embeddings for Stream nodes and write them back."""
+    # Optional: estimate memory before running FastRP
+    if ESTIMATE_MEMORY:
+        try:
+            est = session.run(
+                "CALL gds.fastRP.mutate.estimate($name, { "
                 "  nodeLabels: ['Stream'], "
                 "  mutateProperty: 'embedding', "
-                "  embeddingDimension: 128 "
+                "  embeddingDimension: $dimension "
                 "}) "
-                "YIELD nodePropertiesWritten",
+                "YIELD nodeCount, relationshipCount, bytesMin, bytesMax, requiredMemory",
                 name=GRAPH_NAME,
-            )
+                dimension=EMBEDDING_DIMENSION,
+            ).single()
+            if est:
+                print(
+                    "FastRP estimate:",
+                    f"nodes={est['nodeCount']}",
+                    f"rels={est['relationshipCount']}",
+                    f"bytesMin={est['bytesMin']}",
+                    f"bytesMax={est['bytesMax']}",
+                    f"requiredMemory={est['requiredMemory']}",
+                )
+        except Exception as e:
+            print("FastRP estimate failed:", e)
+
+    # Compute FastRP embeddings in the projection, then persist them on
+    # the Stream nodes for later runs (KNN reads the projected copy)
+    session.run(
+        "CALL gds.fastRP.mutate($name, { "
+        "  nodeLabels: ['Stream'], "
+        "  mutateProperty: $prop, "
+        "  embeddingDimension: $dimension "
+        "}) "
+        "YIELD nodePropertiesWritten",
+        name=GRAPH_NAME,
+        prop=EMBEDDING_PROPERTY,
+        dimension=EMBEDDING_DIMENSION,
+    ).consume()
+    session.run(
+        "CALL gds.graph.nodeProperties.write($name, [$prop], ['Stream']) "
+        "YIELD propertiesWritten",
+        name=GRAPH_NAME,
+        prop=EMBEDDING_PROPERTY,
+    ).consume()
+
+
+def main() -> None:
+    driver = get_driver(Neo4jConfig(
+        URI,
+        *AUTH,
+        max_connection_pool_size=64,
+        connection_acquisition_timeout=120,
+    ))
+    with driver.session(fetch_size=FETCH_SIZE) as session:
+        reuse = (not RECOMPUTE_EMBEDDINGS
+                 and session.execute_read(embeddings_persisted))
 
+        # Drop if exists (to allow re-runs) and project in one transaction
+        session.execute_write(project_graph, reuse)
+
+        if reuse:
+            print("Reusing persisted FastRP embeddings")
+        else:
+            compute_embeddings(session)
+
+        if ESTIMATE_MEMORY:
             try:
                 est = session.run(
-                    "CALL gds.knn.stream.estimate($name, { "
-                    "  topK: 10, "
-                    "  nodeLabels: ['Stream'], "
-                    "  nodeProperties: ['embedding'] "
-                    "}) "
+                    "CALL gds.knn.stream.estimate($name, $config) "
                     "YIELD nodeCount, relationshipCount, bytesMin, bytesMax, requiredMemory",
                     name=GRAPH_NAME,
+                    config=KNN_CONFIG,
                 ).single()
                 if est:
                     print(
@@ -102,27 +254,8 @@ def main() -> None:
             except Exception as e:
                 print("KNN estimate failed:", e)
 
-            # KNN over Stream nodes using the FastRP embedding
-            result = session.run(
-                "CALL gds.knn.stream($name, { "
-                "  topK: 10, "
-                "  nodeLabels: ['Stream'], "
-                "  nodeProperties: ['embedding'] "
-                "}) "
-                "YIELD node1, node2, similarity "
-                "WHERE similarity > 0 "
-                "RETURN gds.util.asNode(node1).id AS node1_id, "
-                "       gds.util.asNode(node2).id AS node2_id, "
-                "       similarity, "
-                "       gds.util.asNode(node1).component_id_2 AS component_id_node_1, "
-                "       gds.util.asNode(node2).component_id_2 AS component_id_node_2 "
-                "ORDER BY similarity DESC ",
-                name=GRAPH_NAME,
-            )
-            with open("knn_results.txt", "w", encoding="utf-8") as f:
-                for record in result:
-                    f.write(f"{record['node1_id']}\t{record['node2_id']}\t{record['similarity']}"
-                            f"\t{record['component_id_node_1'],record['component_id_node_2']}\n")
+        # KNN over Stream nodes using the FastRP embedding
+        write_knn_results(session, KNN_OUTPUT, KNN_TOP_PAIRS)
 
 
 if __name__ == "__main__":
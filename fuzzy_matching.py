@@ -1,7 +1,125 @@
 from ontoaligner import ontology, encoder
-from ontoaligner.aligner import SimpleFuzzySMLightweight
 from ontoaligner.utils import metrics, xmlify
+from rapidfuzz import fuzz, process
+from collections import defaultdict
+import numpy as np
 import json
+import re
+
+FUZZY_SM_THRESHOLD = 0.2
+
+# Tokens shared by more targets than this are too common to block on
+BLOCKING_MAX_POSTINGS = 500
+
+# Rows/columns per cdist call; keeps each score tile cache-sized
+CDIST_TILE = 512
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _tokens(text):
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+def _block_candidates(source_texts, target_texts):
+    """Candidate target ids per source: targets sharing at least one token."""
+    postings = defaultdict(set)
+    for j, text in enumerate(target_texts):
+        for token in _tokens(text):
+            postings[token].add(j)
+    postings = {
+        token: ids for token, ids in postings.items()
+        if len(ids) <= BLOCKING_MAX_POSTINGS
+    }
+    candidates = []
+    for text in source_texts:
+        ids = set()
+        for token in _tokens(text):
+            ids |= postings.get(token, set())
+        candidates.append(sorted(ids))
+    return candidates
+
+
+def _tiled_best(queries, choices, cutoff):
+    """Best choice per query, scoring CDIST_TILE x CDIST_TILE blocks with cdist.
+
+    Only one tile of scores is alive at a time (instead of the full
+    queries x choices matrix), and each tile is folded into a running
+    per-query maximum. Ties keep the lowest choice index, as argmax does.
+    Tiles hold uint8 scores (0-100): cdist zeroes scores below the cutoff
+    before rounding, so rounding never lets a pair through the threshold.
+    """
+    best_columns = np.zeros(len(queries), dtype=np.intp)
+    best_scores = np.full(len(queries), -1, dtype=np.int16)
+    for i in range(0, len(queries), CDIST_TILE):
+        rows = slice(i, i + CDIST_TILE)
+        for j in range(0, len(choices), CDIST_TILE):
+            tile = process.cdist(
+                queries[rows],
+                choices[j:j + CDIST_TILE],
+                scorer=fuzz.ratio,
+                score_cutoff=cutoff,
+                dtype=np.uint8,
+                workers=-1,
+            )
+            columns = tile.argmax(axis=1)
+            scores = tile[np.arange(len(tile)), columns]
+            better = scores > best_scores[rows]
+            best_scores[rows][better] = scores[better]
+            best_columns[rows][better] = columns[better] + j
+    return best_columns, best_scores
+
+
+def fuzzy_match(encoder_output, threshold=FUZZY_SM_THRESHOLD, blocking=True):
+    """Best fuzzy-matching target per source concept.
+
+    Same matching as SimpleFuzzySMLightweight (fuzz.ratio, best target per
+    source, kept when score >= threshold). With blocking, each source is
+    first scored against the targets sharing a token with it; a source with
+    no such target, or none scoring >= threshold, is scored against all
+    targets. Blocking therefore only changes which candidate wins (a
+    better match with no shared token can be missed), not whether a
+    match exists, and is near-linear instead of M x N.
+    Without blocking, all pairs are scored with tiled rapidfuzz cdist calls.
+    """
+    source, target = encoder_output
+    source_texts = [concept["text"] for concept in source]
+    target_texts = [concept["text"] for concept in target]
+    cutoff = threshold * 100
+
+    best = {}
+    if blocking:
+        unblocked = []
+        for i, ids in enumerate(_block_candidates(source_texts, target_texts)):
+            if not ids:
+                unblocked.append(i)
+                continue
+            match = process.extractOne(
+                source_texts[i],
+                [target_texts[j] for j in ids],
+                scorer=fuzz.ratio,
+                score_cutoff=cutoff,
+            )
+            if match is None:
+                unblocked.append(i)
+            else:
+                best[i] = (ids[match[2]], match[1])
+    else:
+        unblocked = list(range(len(source)))
+
+    if unblocked and target_texts:
+        best_columns, best_scores = _tiled_best(
+            [source_texts[i] for i in unblocked], target_texts, cutoff
+        )
+        for i, j, score in zip(unblocked, best_columns, best_scores):
+            best[i] = (j, score)
+
+    return [
+        {"source": source[i]["iri"], "target": target[j]["iri"], "score": float(score) / 100}
+        for i, (j, score) in sorted(best.items())
+        if score / 100 >= threshold
+    ]
+
 
 task = ontology.MaterialInformationMatOntoOMDataset()
 print("Test Task:", task)
@@ -17,8 +135,7 @@ encoder_output = encoder_model(
         source=dataset['source'],
         target=dataset['target']
 )
-model = SimpleFuzzySMLightweight(fuzzy_sm_threshold=0.2)
-matchings = model.generate(input_data=encoder_output)
+matchings = fuzzy_match(encoder_output)
 evaluation = metrics.evaluation_report(
     predicts=matchings,
     references=dataset['reference']
@@ -3,7 +3,16 @@ Configuration for GDS Property Projection.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class ProjectionSchema(NamedTuple):
+    """The parts of a config that are interpolated into query text (hashable)."""
+    source_label: str
+    source_filter: Optional[str]
+    properties_to_project: Tuple[str, ...]
+    property_node_label: str
+    relationship_type: str
 
 
 @dataclass
@@ -36,4 +45,13 @@ class PropertyProjectionConfig:
             raise ValueError("source_label must be specified")
         if not self.properties_to_project:
             raise ValueError("properties_to_project must contain at least one property")
-
+    
+    def schema(self) -> ProjectionSchema:
+        """Return the labels, filter and properties that query texts are built from."""
+        return ProjectionSchema(
+            source_label=self.source_label,
+            source_filter=self.source_filter,
+            properties_to_project=tuple(self.properties_to_project),
+            property_node_label=self.property_node_label,
+            relationship_type=self.relationship_type
+        )
@@ -6,7 +6,9 @@ which is more practical for persistent analysis and easier querying.
 """
 
 import sys
+from functools import lru_cache
 from pathlib import Path
+import numpy as np
 sys.path.append(str(Path(__file__).parent.parent))
 
 from common import Neo4jConnector, Neo4jConfig
@@ -15,6 +17,29 @@ from gds_property_projection.materialized_projection import MaterializedProperty
 from gds_property_projection.projection_manager import GDSPropertyProjectionManager
 
 
+@lru_cache(maxsize=None)
+def shared_properties_query(source_label: str, relationship_type: str, property_label: str) -> str:
+    """
+    Build the "users sharing the most properties" query.
+    
+    Labels and relationship types can't be parameters, so the text is
+    formatted once per combination; the id property and limit are passed
+    as $id_property and $limit, keeping the text (and its plan) stable.
+    """
+    return f"""
+        MATCH (u1:{source_label})-[:{relationship_type}]->(p:{property_label})
+              <-[:{relationship_type}]-(u2:{source_label})
+        WHERE id(u1) < id(u2)
+        WITH u1, u2, count(p) AS shared_properties
+        ORDER BY shared_properties DESC
+        LIMIT $limit
+        RETURN 
+            u1[$id_property] AS user1,
+            u2[$id_property] AS user2,
+            shared_properties
+        """
+
+
 def main():
     """Main example workflow for materialized projection."""
     
@@ -67,10 +92,10 @@ def main():
             print(f"\n  Property: {prop_name}")
             distribution = mat_manager.get_property_distribution(prop_name)
             
-            if distribution:
+            if not distribution.empty:
                 print(f"    Top 5 values:")
-                for i, item in enumerate(distribution[:5], 1):
-                    print(f"      {i}. {item['value']}: {item['count']} users")
+                for i, (value, count) in enumerate(distribution.head(5).itertuples(index=False), 1):
+                    print(f"      {i}. {value}: {count} users")
         
         # ========================================
         # 4. CREATE GDS PROJECTION
@@ -103,14 +128,17 @@ def main():
         community_results = gds_manager.run_community_detection(algorithm="louvain")
         
         if community_results:
-            communities = {}
-            for result in community_results:
-                comm_id = result['communityId']
-                communities[comm_id] = communities.get(comm_id, 0) + 1
+            ids = np.fromiter(
+                (result['communityId'] for result in community_results),
+                dtype=np.int64,
+                count=len(community_results)
+            )
+            comm_ids, sizes = np.unique(ids, return_counts=True)
             
-            print(f"     Found {len(communities)} communities")
-            sorted_communities = sorted(communities.items(), key=lambda x: x[1], reverse=True)
-            for i, (comm_id, size) in enumerate(sorted_communities[:5], 1):
+            print(f"     Found {len(comm_ids)} communities")
+            # Stable sort: ties stay in community id order
+            top = np.argsort(-sizes, kind="stable")[:5]
+            for i, (comm_id, size) in enumerate(zip(comm_ids[top], sizes[top]), 1):
                 print(f"       {i}. Community {comm_id}: {size} users")
         
         # ========================================
@@ -120,25 +148,22 @@ def main():
         print("\n[5] Running custom queries on materialized graph...")
         
         # Example: Find users who share the most properties
-        query = f"""
-        MATCH (u1:{projection_config.source_label})-[:{projection_config.relationship_type}]->(p:{projection_config.property_node_label})
-              <-[:{projection_config.relationship_type}]-(u2:{projection_config.source_label})
-        WHERE id(u1) < id(u2)
-        WITH u1, u2, count(p) AS shared_properties
-        ORDER BY shared_properties DESC
-        LIMIT 10
-        RETURN 
-            u1.{projection_config.source_id_property} AS user1,
-            u2.{projection_config.source_id_property} AS user2,
-            shared_properties
-        """
-        
-        shared_props = connector.execute_query(query)
-        if shared_props:
-            print("     Top 10 user pairs with most shared properties:")
-            for i, result in enumerate(shared_props, 1):
-                print(f"       {i}. User {result['user1']} & User {result['user2']}: "
-                      f"{result['shared_properties']} shared properties")
+        query = shared_properties_query(
+            projection_config.source_label,
+            projection_config.relationship_type,
+            projection_config.property_node_label
+        )
+        # Bulk queries return scalar columns only (never whole nodes) and are
+        # streamed as plain value lists
+        shared_props = connector.iter_values(query, {
+            "id_property": projection_config.source_id_property,
+            "limit": 10
+        })
+        for i, (user1, user2, shared) in enumerate(shared_props, 1):
+            if i == 1:
+                print("     Top 10 user pairs with most shared properties:")
+            print(f"       {i}. User {user1} & User {user2}: "
+                  f"{shared} shared properties")
         
         # ========================================
         # 7. CLEANUP OPTIONS
@@ -10,6 +10,7 @@ This script demonstrates how to:
 
 import sys
 from pathlib import Path
+import numpy as np
 sys.path.append(str(Path(__file__).parent.parent))
 
 from common import Neo4jConnector, Neo4jConfig
@@ -141,15 +142,18 @@ def main():
         
         if community_results:
             # Count communities
-            communities = {}
-            for result in community_results:
-                comm_id = result['communityId']
-                communities[comm_id] = communities.get(comm_id, 0) + 1
+            ids = np.fromiter(
+                (result['communityId'] for result in community_results),
+                dtype=np.int64,
+                count=len(community_results)
+            )
+            comm_ids, sizes = np.unique(ids, return_counts=True)
             
-            print(f"     Found {len(communities)} communities")
+            print(f"     Found {len(comm_ids)} communities")
             print(f"     Top 5 largest communities:")
-            sorted_communities = sorted(communities.items(), key=lambda x: x[1], reverse=True)
-            for i, (comm_id, size) in enumerate(sorted_communities[:5], 1):
+            # Stable sort: ties stay in community id order
+            top = np.argsort(-sizes, kind="stable")[:5]
+            for i, (comm_id, size) in enumerate(zip(comm_ids[top], sizes[top]), 1):
                 print(f"       {i}. Community {comm_id}: {size} users")
         
         # ========================================
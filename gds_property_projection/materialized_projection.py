@@ -8,13 +8,19 @@ rather than virtual nodes in GDS. This can be more practical for:
 - Integration with existing workflows
 """
 
+import csv
+import json
 import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from typing import Dict, Any, List
+import pandas as pd
+from typing import Dict, Any, Iterable
 from common import Neo4jConnector
-from .config import PropertyProjectionConfig
+from .config import ProjectionSchema, PropertyProjectionConfig
 
 
 class MaterializedPropertyProjection:
@@ -27,96 +33,421 @@ class MaterializedPropertyProjection:
     3. Creates a standard GDS projection over the materialized graph
     """
     
-    def __init__(self, connector: Neo4jConnector, config: PropertyProjectionConfig):
+    def __init__(self, connector: Neo4jConnector, config: PropertyProjectionConfig,
+                 drop_on_exit: bool = False):
         """
         Initialize the materialized projection manager.
         
         Args:
             connector: Neo4j connector instance
             config: Property projection configuration
+            drop_on_exit: Drop the GDS projection when leaving a ``with`` block
         """
         self.connector = connector
         self.config = config
+        self.drop_on_exit = drop_on_exit
+        self._indexes_ready = False
+        self._build_queries()
     
-    def create_property_nodes(self, batch_size: int = 10000) -> Dict[str, int]:
+    def __enter__(self):
+        """Context manager entry: create (or reuse) the GDS projection."""
+        self.create_gds_projection()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit: drop the projection if drop_on_exit is set."""
+        if self.drop_on_exit:
+            self.drop_projection()
+    
+    def _build_queries(self):
+        """Look up the rendered query texts for this config (see _render_queries)."""
+        queries = self._render_queries(self.config.schema())
+        self._q_values = queries['values']
+        self._q_pairs = queries['pairs']
+        self._q_export_pairs = queries['export_pairs']
+        self._q_write_nodes = queries['write_nodes']
+        self._q_create_nodes = queries['create_nodes']
+        self._q_has_property_nodes = queries['has_property_nodes']
+        self._q_write_rels = queries['write_rels']
+        self._q_apoc_outer = queries['apoc_outer']
+        self._q_apoc_inner = queries['apoc_inner']
+        self._q_expected_counts = queries['expected_counts']
+        self._q_delete = queries['delete']
+        self._q_distribution = queries['distribution']
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _render_queries(cfg: ProjectionSchema) -> Dict[str, Any]:
+        """
+        Render the config-dependent query texts once per schema.
+        
+        Labels, relationship types and the source filter can't be query
+        parameters, but they are fixed for the life of the config, so every
+        call sends the same text and hits Neo4j's plan cache. Texts are
+        cached per schema, so instances for the same config share them.
+        """
+        queries = {}
+        filter_clause = cfg.source_filter or ""
+        
+        # One label scan covers every property: each source row is unwound
+        # into its (name, value) pairs. source_filter is written against `n`
+        # (e.g. "WHERE n.active = true")
+        source_match = f"""
+        MATCH (n:{cfg.source_label})
+        {filter_clause}
+        UNWIND $props AS name
+        WITH n AS source, name, source[name] AS propValue
+        WHERE propValue IS NOT NULL
+        """
+        queries['values'] = source_match + "RETURN DISTINCT name, toString(propValue) AS value"
+        queries['pairs'] = source_match + "RETURN elementId(source) AS id, name, toString(propValue) AS value"
+        queries['export_pairs'] = source_match + "RETURN source[$id_property] AS id, name, toString(propValue) AS value"
+        
+        # Phase 1: one Property node per distinct (name, value). The rows
+        # are already distinct, so on an initial load (no Property nodes for
+        # these properties yet) they are CREATEd without a per-row
+        # existence check; otherwise they are MERGEd
+        queries['write_nodes'] = f"""
+        UNWIND $rows AS row
+        MERGE (p:{cfg.property_node_label} {{name: row.name, value: row.value}})
+        RETURN count(*) AS written
+        """
+        queries['create_nodes'] = f"""
+        UNWIND $rows AS row
+        CREATE (p:{cfg.property_node_label} {{name: row.name, value: row.value}})
+        RETURN count(*) AS written
+        """
+        queries['has_property_nodes'] = f"""
+        RETURN EXISTS {{
+            MATCH (p:{cfg.property_node_label}) WHERE p.name IN $props
+        }} AS present
+        """
+        
+        # Phase 2: relationships to the (now existing) Property nodes, found
+        # by an index seek instead of a MERGE per row
+        queries['write_rels'] = f"""
+        UNWIND $rows AS row
+        MATCH (source) WHERE elementId(source) = row.id
+        MATCH (p:{cfg.property_node_label} {{name: row.name, value: row.value}})
+        MERGE (source)-[:{cfg.relationship_type}]->(p)
+        RETURN count(*) AS written
+        """
+        
+        # apoc.periodic.iterate statements, passed as $outer / $inner
+        queries['apoc_outer'] = f"""
+        MATCH (n:{cfg.source_label})
+        {filter_clause}
+        RETURN n AS source
+        """
+        queries['apoc_inner'] = f"""
+        UNWIND $props AS name
+        WITH source, name, source[name] AS propValue
+        WHERE propValue IS NOT NULL
+        MERGE (p:{cfg.property_node_label} {{name: name, value: toString(propValue)}})
+        MERGE (source)-[:{cfg.relationship_type}]->(p)
+        """
+        
+        # Label-only counts, answered from the count store
+        queries['expected_counts'] = f"""
+        CALL {{ MATCH (n:{cfg.source_label}) RETURN count(n) AS sources }}
+        CALL {{ MATCH (p:{cfg.property_node_label}) RETURN count(p) AS properties }}
+        CALL {{ MATCH (:{cfg.source_label})-[r:{cfg.relationship_type}]->() RETURN count(r) AS relationships }}
+        RETURN sources + properties AS nodeCount, relationships AS relationshipCount
+        """
+        
+        queries['delete'] = f"""
+        MATCH (p:{cfg.property_node_label})
+        DETACH DELETE p
+        RETURN count(p) AS deleted
+        """
+        
+        queries['distribution'] = f"""
+        MATCH (p:{cfg.property_node_label} {{name: $name}})
+        MATCH (source:{cfg.source_label})-[:{cfg.relationship_type}]->(p)
+        RETURN p.value AS value, count(source) AS count
+        ORDER BY count DESC
+        LIMIT 50
+        """
+        return queries
+    
+    def create_property_nodes(self, batch_size: int = 10000, use_apoc: bool = False,
+                              parallel: bool = False, workers: int = 1) -> Dict[str, int]:
         """
         Create physical Property nodes in the database.
         
+        All properties are handled in one pass per phase: the distinct
+        (name, value) pairs are streamed and MERGEd as Property nodes
+        first (plain CREATE when none exist yet for these properties), then
+        the (source, name, value) rows are streamed and linked with MATCH +
+        MERGE of the relationship. Both phases write in
+        UNWIND transactions of batch_size rows, backed by a uniqueness
+        constraint on the Property (name, value) pair. With
+        use_apoc, the batching runs on the server instead (see
+        _create_property_nodes_apoc).
+        
         Args:
             batch_size: Number of nodes to process per batch
+            use_apoc: Batch with apoc.periodic.iterate (requires APOC)
+            parallel: Run the APOC batches in parallel. Batches MERGE the
+                same Property nodes, so expect lock contention and retries
+            workers: Write transactions in flight at once (without
+                use_apoc). Phase-1 batches hold distinct values; phase-2
+                batches can lock the same Property node, and deadlocked
+                transactions are retried by the driver
             
         Returns:
             Statistics about created nodes and relationships
         """
         stats = {'properties_created': 0, 'relationships_created': 0}
         
-        filter_clause = self.config.source_filter or ""
-        
         print(f"Creating Property nodes for {len(self.config.properties_to_project)} properties...")
+        self._ensure_indexes()
+        
+        if use_apoc:
+            return self._create_property_nodes_apoc(batch_size, parallel)
+        
+        params = {'props': list(self.config.properties_to_project)}
+        values_per_property = Counter()
         
+        def values():
+            for record in self.connector.iter_query(self._q_values, params):
+                values_per_property[record['name']] += 1
+                yield record
+        
+        initial_load = not self.connector.fetch_column(self._q_has_property_nodes, 'present', params)[0]
+        nodes_query = self._q_create_nodes if initial_load else self._q_write_nodes
+        stats['properties_created'] = self._write_in_batches(nodes_query, values(), batch_size,
+                                                             params, workers)
         for prop_name in self.config.properties_to_project:
-            print(f"  Processing property: {prop_name}")
-            
-            # Create Property nodes and relationships in batches
-            query = f"""
-            MATCH (source:{self.config.source_label})
-            {filter_clause}
-            WHERE source.{prop_name} IS NOT NULL
-            WITH source, source.{prop_name} AS propValue
-            
-            // Create or match Property node
-            MERGE (p:{self.config.property_node_label} {{
-                name: '{prop_name}',
-                value: toString(propValue)
-            }})
-            
-            // Create relationship
-            MERGE (source)-[:{self.config.relationship_type}]->(p)
+            print(f"  {prop_name}: {values_per_property[prop_name]} property nodes")
+        
+        pairs = self.connector.iter_query(self._q_pairs, params)
+        stats['relationships_created'] = self._write_in_batches(self._q_write_rels, pairs, batch_size,
+                                                                params, workers)
+        
+        print(f"\n✓ Total: {stats['properties_created']} property nodes, "
+              f"{stats['relationships_created']} relationships")
+        
+        return stats
+    
+    def export_bulk_csv(self, out_dir: str) -> Dict[str, int]:
+        """
+        Write Property nodes and relationships as neo4j-admin import CSV files.
+        
+        For a first-time load, ``neo4j-admin database import full`` is far
+        faster than creating the graph over Bolt. This reads the source
+        nodes (two streaming passes, nothing is written to the database)
+        and writes:
+        
+        - ``properties.csv``: one row per distinct (name, value), with the
+          JSON array ``[name, value]`` as id in the Property id space (no
+          two pairs can share it). Values are strings, as on the Bolt path
+          (``toString``), so later MERGEs find the imported nodes
+        - ``has.csv``: one row per source node and value, keyed by the
+          source id property in an id space named after the source label
+        
+        The source nodes themselves must be imported in the same run, with
+        their id column in that id space; the command to run is printed.
+        
+        Args:
+            out_dir: Directory to write the CSV files to (created if missing)
             
-            RETURN count(DISTINCT p) AS props_created, count(*) AS rels_created
-            """
+        Returns:
+            Number of property and relationship rows written
+        """
+        out_path = Path(out_dir)
+        out_path.mkdir(parents=True, exist_ok=True)
+        cfg = self.config
+        params = {
+            'props': list(cfg.properties_to_project),
+            'id_property': cfg.source_id_property
+        }
+        stats = {'properties': 0, 'relationships': 0}
+        
+        properties_file = out_path / "properties.csv"
+        with open(properties_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([":ID(Property)", "name:string", "value:string", ":LABEL"])
+            for name, value in self.connector.iter_values(self._q_values, params):
+                writer.writerow([json.dumps([name, value]), name, value, cfg.property_node_label])
+                stats['properties'] += 1
+        
+        relationships_file = out_path / "has.csv"
+        with open(relationships_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([f":START_ID({cfg.source_label})", ":END_ID(Property)", ":TYPE"])
+            for source_id, name, value in self.connector.iter_values(self._q_export_pairs, params):
+                writer.writerow([source_id, json.dumps([name, value]), cfg.relationship_type])
+                stats['relationships'] += 1
+        
+        print(f"✓ Wrote {stats['properties']:,} property rows to {properties_file}")
+        print(f"✓ Wrote {stats['relationships']:,} relationship rows to {relationships_file}")
+        print("\nImport into an empty database (stopped) with:")
+        print(f"  neo4j-admin database import full "
+              f"--nodes={cfg.source_label}=<{cfg.source_label.lower()}s.csv> "
+              f"--nodes={properties_file} --relationships={relationships_file} <database>")
+        
+        return stats
+    
+    def _write_in_batches(self, query: str, rows: Iterable[Any], batch_size: int,
+                          params: Dict[str, Any], workers: int = 1) -> int:
+        """
+        Run a write query over rows in chunks of batch_size.
+        
+        Each chunk is passed as $rows (alongside params) in its own write
+        transaction; the query must return a ``written`` count. With
+        workers > 1, chunks are written from a thread pool, each on its own
+        session (and pooled connection). At most twice that many chunks are
+        held in memory, so rows can still be streamed.
+        
+        Returns:
+            Sum of the ``written`` counts
+        """
+        def write(chunk):
+            result = self.connector.execute_write(query, {**params, 'rows': chunk})
+            return result[0]['written'] if result else 0
+        
+        def chunks():
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= batch_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        
+        if workers <= 1:
+            return sum(write(chunk) for chunk in chunks())
+        
+        written = 0
+        pending = set()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk in chunks():
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    written += sum(future.result() for future in done)
+                pending.add(executor.submit(write, chunk))
+            written += sum(future.result() for future in pending)
+        return written
+    
+    def _create_property_nodes_apoc(self, batch_size: int, parallel: bool) -> Dict[str, int]:
+        """
+        Create Property nodes and HAS relationships with apoc.periodic.iterate.
+        
+        One server-side pass over the source nodes handles every projected
+        property; each batch of batch_size source nodes commits in its own
+        transaction. Counts are the nodes and relationships actually
+        created (existing ones are not counted).
+        
+        Args:
+            batch_size: Number of source nodes per transaction
+            parallel: Run batches in parallel
             
-            result = self.connector.execute_write(query)
-            if result:
-                stats['properties_created'] += result[0]['props_created']
-                stats['relationships_created'] += result[0]['rels_created']
-                print(f"    ✓ Created {result[0]['props_created']} property nodes, "
-                      f"{result[0]['rels_created']} relationships")
+        Returns:
+            Statistics about created nodes and relationships
+        """
+        query = """
+        CALL apoc.periodic.iterate($outer, $inner, {
+            batchSize: $batch_size,
+            parallel: $parallel,
+            retries: 3,
+            params: {props: $props}
+        })
+        YIELD batches, failedOperations, errorMessages, updateStatistics
+        RETURN batches, failedOperations, errorMessages, updateStatistics
+        """
+        
+        result = self.connector.execute_write(query, {
+            'outer': self._q_apoc_outer,
+            'inner': self._q_apoc_inner,
+            'batch_size': batch_size,
+            'parallel': parallel,
+            'props': list(self.config.properties_to_project)
+        })
+        if not result:
+            return {'properties_created': 0, 'relationships_created': 0}
         
+        record = result[0]
+        if record['failedOperations']:
+            print(f"  ⚠ {record['failedOperations']} operations failed: {record['errorMessages']}")
+        
+        stats = {
+            'properties_created': record['updateStatistics'].get('nodesCreated', 0),
+            'relationships_created': record['updateStatistics'].get('relationshipsCreated', 0)
+        }
         print(f"\n✓ Total: {stats['properties_created']} property nodes, "
-              f"{stats['relationships_created']} relationships")
+              f"{stats['relationships_created']} relationships "
+              f"({record['batches']} batches)")
         
         return stats
     
+    def _ensure_indexes(self):
+        """
+        Create the schema that property-node creation relies on, once.
+        
+        A uniqueness constraint on Property (name, value) makes each
+        Property MERGE/MATCH an index seek instead of a label scan (which
+        grows with every Property node created). Source nodes also get an
+        index on their id property for lookups by id.
+        """
+        if self._indexes_ready:
+            return
+        label = self.config.property_node_label
+        source_label = self.config.source_label
+        self.connector.execute_write(f"""
+        CREATE CONSTRAINT {label.lower()}_name_value IF NOT EXISTS
+        FOR (p:{label}) REQUIRE (p.name, p.value) IS UNIQUE
+        """)
+        self.connector.execute_write(f"""
+        CREATE INDEX {source_label.lower()}_{self.config.source_id_property} IF NOT EXISTS
+        FOR (n:{source_label}) ON (n.{self.config.source_id_property})
+        """)
+        self._indexes_ready = True
+    
     def create_gds_projection(self) -> Dict[str, Any]:
         """
         Create a GDS projection over the materialized property graph.
         
+        An existing projection with the same name is reused as long as its
+        node and relationship counts still match the database, since
+        re-projecting scans the whole store again. A stale one is dropped
+        and projected again; use refresh() to force that.
+        
         Returns:
             Projection statistics
         """
-        # Drop existing projection if it exists
-        self.drop_projection()
-        
-        filter_clause = self.config.source_filter or ""
+        info_query = """
+        CALL gds.graph.list($graph_name)
+        YIELD graphName, nodeCount, relationshipCount
+        RETURN graphName, nodeCount, relationshipCount
+        """
+        existing, expected = self.connector.execute_read_many([
+            (info_query, {'graph_name': self.config.graph_name}),
+            (self._q_expected_counts, None)
+        ])
+        if existing:
+            current = existing[0]
+            if (expected and current['nodeCount'] == expected[0]['nodeCount']
+                    and current['relationshipCount'] == expected[0]['relationshipCount']):
+                print(f"\n✓ Reusing GDS projection '{self.config.graph_name}' "
+                      f"({current['nodeCount']:,} nodes, {current['relationshipCount']:,} relationships)")
+                return {**current, 'projectMillis': 0}
+            self.drop_projection()
         
         # Create native projection (faster than Cypher projection for materialized graphs)
-        query = f"""
-        CALL gds.graph.project(
-            '{self.config.graph_name}',
-            ['{self.config.source_label}', '{self.config.property_node_label}'],
-            {{
-                {self.config.relationship_type}: {{
-                    orientation: 'NATURAL'
-                }}
-            }}
-        )
+        query = """
+        CALL gds.graph.project($graph_name, $node_labels, $rel_projection)
         YIELD graphName, nodeCount, relationshipCount, projectMillis
         RETURN graphName, nodeCount, relationshipCount, projectMillis
         """
         
         print(f"\nCreating GDS projection '{self.config.graph_name}'...")
-        result = self.connector.execute_query(query)
+        result = self.connector.run_procedure(query, {
+            'graph_name': self.config.graph_name,
+            'node_labels': [self.config.source_label, self.config.property_node_label],
+            'rel_projection': {self.config.relationship_type: {'orientation': 'NATURAL'}}
+        })
         
         if result:
             stats = result[0]
@@ -129,11 +460,21 @@ class MaterializedPropertyProjection:
         
         return {}
     
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Drop the GDS projection and project it again.
+        
+        Returns:
+            Projection statistics
+        """
+        self.drop_projection()
+        return self.create_gds_projection()
+    
     def drop_projection(self) -> bool:
         """Drop the GDS graph projection if it exists."""
         try:
-            query = f"CALL gds.graph.drop('{self.config.graph_name}')"
-            self.connector.execute_query(query)
+            query = "CALL gds.graph.drop($graph_name)"
+            self.connector.run_procedure(query, {'graph_name': self.config.graph_name})
             return True
         except Exception:
             return False
@@ -147,18 +488,12 @@ class MaterializedPropertyProjection:
         Returns:
             Number of nodes deleted
         """
-        query = f"""
-        MATCH (p:{self.config.property_node_label})
-        DETACH DELETE p
-        RETURN count(p) AS deleted
-        """
-        
-        result = self.connector.execute_write(query)
+        result = self.connector.execute_write(self._q_delete)
         deleted = result[0]['deleted'] if result else 0
         print(f"✓ Deleted {deleted} Property nodes")
         return deleted
     
-    def get_property_distribution(self, property_name: str) -> List[Dict[str, Any]]:
+    def get_property_distribution(self, property_name: str) -> pd.DataFrame:
         """
         Get distribution of values for a specific property.
         
@@ -166,14 +501,9 @@ class MaterializedPropertyProjection:
             property_name: Name of the property to analyze
             
         Returns:
-            List of value counts
-        """
-        query = f"""
-        MATCH (p:{self.config.property_node_label} {{name: '{property_name}'}})
-        MATCH (source:{self.config.source_label})-[:{self.config.relationship_type}]->(p)
-        RETURN p.value AS value, count(source) AS count
-        ORDER BY count DESC
-        LIMIT 50
+            DataFrame with ``value`` and ``count`` columns, most common first
         """
-        return self.connector.execute_query(query)
+        # Rows are read as plain value lists and handed to pandas in one go
+        rows = self.connector.iter_values(self._q_distribution, {'name': property_name})
+        return pd.DataFrame.from_records(list(rows), columns=['value', 'count'])
 
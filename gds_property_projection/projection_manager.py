@@ -3,12 +3,30 @@ GDS Property Projection Manager - Creates graph projections with properties as n
 """
 
 import sys
+from functools import lru_cache
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from typing import Dict, Any, List, Optional
 from common import Neo4jConnector
-from .config import PropertyProjectionConfig
+from .config import ProjectionSchema, PropertyProjectionConfig
+
+# Community detection procedures by algorithm name
+COMMUNITY_ALGORITHMS = {
+    "louvain": "gds.louvain.mutate",
+    "labelPropagation": "gds.labelPropagation.mutate",
+    "wcc": "gds.wcc.mutate"
+}
+
+# In-memory node property that algorithm results are mutated into before
+# being streamed back for source nodes only
+RESULT_PROPERTY = "propertyProjectionResult"
+
+DROP_RESULT_QUERY = """
+CALL gds.graph.nodeProperties.drop($graph_name, [$property], {failIfMissing: false})
+YIELD propertiesRemoved
+RETURN propertiesRemoved
+"""
 
 
 class GDSPropertyProjectionManager:
@@ -30,6 +48,99 @@ class GDSPropertyProjectionManager:
         """
         self.connector = connector
         self.config = config
+        self._build_queries()
+    
+    def _build_queries(self):
+        """Look up the rendered query texts for this config (see _render_queries)."""
+        queries = self._render_queries(self.config.schema())
+        self._q_source_count = queries['source_count']
+        self._q_cypher_projection = queries['cypher_projection']
+        self._q_community = queries['community']
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _render_queries(cfg: ProjectionSchema) -> Dict[str, Any]:
+        """
+        Render the config-dependent query texts once per schema.
+        
+        Labels, relationship types and the source filter can't be query
+        parameters, but they are fixed for the life of the config; the
+        variable parts are $parameters, so each method always sends the
+        same text and hits Neo4j's plan cache. Texts are cached per schema,
+        so managers built for the same config share them.
+        """
+        queries = {}
+        filter_clause = cfg.source_filter or ""
+        
+        queries['source_count'] = f"""
+        MATCH (n:{cfg.source_label})
+        {filter_clause}
+        RETURN count(n) as count
+        """
+        
+        queries['cypher_projection'] = f"""
+        CALL gds.graph.project.cypher(
+            $graph_name,
+            '
+            // Source nodes and property nodes from one scan: a null key
+            // stands for the source node itself, the others for its values
+            MATCH (n:{cfg.source_label})
+            {filter_clause}
+            UNWIND [null] + {list(cfg.properties_to_project)} AS propKey
+            WITH n, propKey, toString(n[propKey]) AS value
+            WHERE propKey IS NULL OR value IS NOT NULL
+            // Source rows group by node id; property (virtual) nodes group by
+            // (key, value) and are kept only for values shared by 2+ sources
+            WITH
+                CASE WHEN propKey IS NULL THEN id(n) END AS sourceId,
+                CASE WHEN propKey IS NULL THEN labels(n) END AS sourceLabels,
+                propKey, value, count(*) AS sources
+            WHERE sourceId IS NOT NULL OR sources > 1
+            RETURN 
+                CASE WHEN sourceId IS NOT NULL THEN sourceId ELSE
+                    gds.util.asNode(
+                        gds.graph.project.remote.nodeId(
+                            '{cfg.property_node_label}:' + propKey + ':' + value
+                        )
+                    )
+                END AS id,
+                coalesce(sourceLabels, ['{cfg.property_node_label}']) AS labels
+            ',
+            '
+            // Relationships from source to properties
+            MATCH (source:{cfg.source_label})
+            {filter_clause}
+            UNWIND {list(cfg.properties_to_project)} AS propKey
+            WITH source, propKey, source[propKey] AS propValue
+            WHERE propValue IS NOT NULL
+            WITH propKey, toString(propValue) AS value, collect(id(source)) AS sourceIds
+            WHERE size(sourceIds) > 1
+            UNWIND sourceIds AS sourceId
+            RETURN 
+                sourceId AS source,
+                gds.util.asNode(
+                    gds.graph.project.remote.nodeId(
+                        '{cfg.property_node_label}:' + propKey + ':' + value
+                    )
+                ) AS target,
+                '{cfg.relationship_type}' AS type
+            '
+        )
+        YIELD graphName, nodeCount, relationshipCount, projectMillis
+        RETURN graphName, nodeCount, relationshipCount, projectMillis
+        """
+        
+        # One mutate query per community algorithm; only the procedure name
+        # is interpolated
+        queries['community'] = {
+            algorithm: f"""
+        CALL {procedure}($graph_name, {{mutateProperty: $property}})
+        YIELD nodePropertiesWritten
+        RETURN nodePropertiesWritten
+        """
+            for algorithm, procedure in COMMUNITY_ALGORITHMS.items()
+        }
+        return queries
     
     def check_gds_available(self) -> bool:
         """
@@ -55,13 +166,7 @@ class GDSPropertyProjectionManager:
         Returns:
             Number of source nodes
         """
-        filter_clause = self.config.source_filter or ""
-        query = f"""
-        MATCH (n:{self.config.source_label})
-        {filter_clause}
-        RETURN count(n) as count
-        """
-        result = self.connector.execute_query(query)
+        result = self.connector.execute_query(self._q_source_count)
         return result[0]["count"] if result else 0
     
     def create_cypher_projection(self) -> Dict[str, Any]:
@@ -70,7 +175,9 @@ class GDSPropertyProjectionManager:
         
         This creates a virtual graph where:
         - Source nodes (e.g., User) are included
-        - Each property value becomes a Property node
+        - Each property value shared by at least two source nodes becomes a
+          Property node (a value held by one node links nothing, so it
+          carries no similarity signal and is not projected)
         - HAS relationships connect source nodes to their property nodes
         
         Returns:
@@ -79,76 +186,8 @@ class GDSPropertyProjectionManager:
         # First, drop existing projection if it exists
         self.drop_projection()
         
-        filter_clause = self.config.source_filter or ""
-        
-        # Build property projection clauses
-        property_projections = []
-        for prop in self.config.properties_to_project:
-            property_projections.append(f"""
-            // Property: {prop}
-            OPTIONAL MATCH (source:{self.config.source_label})
-            {filter_clause}
-            WHERE source.{prop} IS NOT NULL
-            WITH source, source.{prop} AS propValue_{prop}
-            RETURN 
-                id(source) AS source,
-                gds.util.asNode(
-                    gds.graph.project.remote.nodeId(
-                        '{self.config.property_node_label}:' + '{prop}:' + toString(propValue_{prop})
-                    )
-                ) AS target,
-                '{self.config.relationship_type}' AS type
-            """)
-        
-        # Create the main projection query
-        projection_query = f"""
-        CALL gds.graph.project.cypher(
-            '{self.config.graph_name}',
-            '
-            // Source nodes
-            MATCH (n:{self.config.source_label})
-            {filter_clause}
-            RETURN id(n) AS id, labels(n) AS labels
-            
-            UNION ALL
-            
-            // Property nodes (virtual)
-            MATCH (n:{self.config.source_label})
-            {filter_clause}
-            UNWIND {self.config.properties_to_project} AS propKey
-            WITH n, propKey, n[propKey] AS propValue
-            WHERE propValue IS NOT NULL
-            RETURN 
-                gds.util.asNode(
-                    gds.graph.project.remote.nodeId(
-                        '{self.config.property_node_label}:' + propKey + ':' + toString(propValue)
-                    )
-                ) AS id,
-                ['{self.config.property_node_label}'] AS labels
-            ',
-            '
-            // Relationships from source to properties
-            MATCH (source:{self.config.source_label})
-            {filter_clause}
-            UNWIND {self.config.properties_to_project} AS propKey
-            WITH source, propKey, source[propKey] AS propValue
-            WHERE propValue IS NOT NULL
-            RETURN 
-                id(source) AS source,
-                gds.util.asNode(
-                    gds.graph.project.remote.nodeId(
-                        '{self.config.property_node_label}:' + propKey + ':' + toString(propValue)
-                    )
-                ) AS target,
-                '{self.config.relationship_type}' AS type
-            '
-        )
-        YIELD graphName, nodeCount, relationshipCount, projectMillis
-        RETURN graphName, nodeCount, relationshipCount, projectMillis
-        """
-        
         print(f"Creating GDS projection '{self.config.graph_name}'...")
-        result = self.connector.execute_query(projection_query)
+        result = self.connector.run_procedure(self._q_cypher_projection, {'graph_name': self.config.graph_name})
         
         if result:
             stats = result[0]
@@ -169,12 +208,12 @@ class GDSPropertyProjectionManager:
             True if projection was dropped, False if it didn't exist
         """
         try:
-            query = f"""
-            CALL gds.graph.drop('{self.config.graph_name}')
+            query = """
+            CALL gds.graph.drop($graph_name)
             YIELD graphName
             RETURN graphName
             """
-            result = self.connector.execute_query(query)
+            result = self.connector.run_procedure(query, {'graph_name': self.config.graph_name})
             if result:
                 print(f"✓ Dropped existing projection: {result[0]['graphName']}")
                 return True
@@ -201,10 +240,14 @@ class GDSPropertyProjectionManager:
         Returns:
             Projection information or None if not found
         """
-        projections = self.list_projections()
-        for proj in projections:
-            if proj['graphName'] == self.config.graph_name:
-                return proj
+        # gds.graph.list filters by name on the server
+        query = """
+        CALL gds.graph.list($graph_name)
+        YIELD graphName, nodeCount, relationshipCount, memoryUsage
+        RETURN graphName, nodeCount, relationshipCount, memoryUsage
+        """
+        for proj in self.connector.iter_query(query, {'graph_name': self.config.graph_name}):
+            return proj
         return None
 
     def run_node_similarity(self, top_k: int = 10, similarity_cutoff: float = 0.0) -> List[Dict[str, Any]]:
@@ -220,20 +263,25 @@ class GDSPropertyProjectionManager:
         Returns:
             List of similarity results
         """
-        query = f"""
-        CALL gds.nodeSimilarity.stream('{self.config.graph_name}', {{
-            topK: {top_k},
-            similarityCutoff: {similarity_cutoff}
-        }})
+        query = """
+        CALL gds.nodeSimilarity.stream($graph_name, {
+            topK: $top_k,
+            similarityCutoff: $similarity_cutoff
+        })
         YIELD node1, node2, similarity
         RETURN
-            gds.util.asNode(node1).{self.config.source_id_property} AS node1_id,
-            gds.util.asNode(node2).{self.config.source_id_property} AS node2_id,
+            gds.util.asNode(node1)[$id_property] AS node1_id,
+            gds.util.asNode(node2)[$id_property] AS node2_id,
             similarity
         ORDER BY similarity DESC
         LIMIT 100
         """
-        return self.connector.execute_query(query)
+        return self.connector.execute_query(query, {
+            'graph_name': self.config.graph_name,
+            'top_k': top_k,
+            'similarity_cutoff': similarity_cutoff,
+            'id_property': self.config.source_id_property
+        })
 
     def run_pagerank(self, max_iterations: int = 20, damping_factor: float = 0.85) -> List[Dict[str, Any]]:
         """
@@ -246,21 +294,29 @@ class GDSPropertyProjectionManager:
         Returns:
             List of nodes with PageRank scores
         """
-        query = f"""
-        CALL gds.pageRank.stream('{self.config.graph_name}', {{
-            maxIterations: {max_iterations},
-            dampingFactor: {damping_factor}
-        }})
-        YIELD nodeId, score
-        WITH gds.util.asNode(nodeId) AS node, score
-        WHERE '{self.config.source_label}' IN labels(node)
-        RETURN
-            node.{self.config.source_id_property} AS node_id,
-            score
+        mutate_query = """
+        CALL gds.pageRank.mutate($graph_name, {
+            maxIterations: $max_iterations,
+            dampingFactor: $damping_factor,
+            mutateProperty: $property
+        })
+        YIELD nodePropertiesWritten
+        RETURN nodePropertiesWritten
+        """
+        stream_query = """
+        CALL gds.graph.nodeProperty.stream($graph_name, $property, [$source_label])
+        YIELD nodeId, propertyValue
+        WITH nodeId, propertyValue AS score
         ORDER BY score DESC
         LIMIT 100
+        RETURN
+            gds.util.asNode(nodeId)[$id_property] AS node_id,
+            score
         """
-        return self.connector.execute_query(query)
+        return self._run_on_source_nodes(mutate_query, stream_query, {
+            'max_iterations': max_iterations,
+            'damping_factor': damping_factor
+        })
 
     def run_community_detection(self, algorithm: str = "louvain") -> List[Dict[str, Any]]:
         """
@@ -272,27 +328,59 @@ class GDSPropertyProjectionManager:
         Returns:
             List of nodes with community assignments
         """
-        algo_map = {
-            "louvain": "gds.louvain.stream",
-            "labelPropagation": "gds.labelPropagation.stream",
-            "wcc": "gds.wcc.stream"
-        }
+        if algorithm not in self._q_community:
+            raise ValueError(f"Unknown algorithm: {algorithm}. Choose from {list(COMMUNITY_ALGORITHMS.keys())}")
 
-        if algorithm not in algo_map:
-            raise ValueError(f"Unknown algorithm: {algorithm}. Choose from {list(algo_map.keys())}")
-
-        query = f"""
-        CALL {algo_map[algorithm]}('{self.config.graph_name}')
-        YIELD nodeId, communityId
-        WITH gds.util.asNode(nodeId) AS node, communityId
-        WHERE '{self.config.source_label}' IN labels(node)
-        RETURN
-            node.{self.config.source_id_property} AS node_id,
-            communityId
+        stream_query = """
+        CALL gds.graph.nodeProperty.stream($graph_name, $property, [$source_label])
+        YIELD nodeId, propertyValue
+        WITH nodeId, propertyValue AS communityId
         ORDER BY communityId
         LIMIT 1000
+        RETURN
+            gds.util.asNode(nodeId)[$id_property] AS node_id,
+            communityId
         """
-        return self.connector.execute_query(query)
+        return self._run_on_source_nodes(self._q_community[algorithm], stream_query, {})
+
+    def _run_on_source_nodes(self, mutate_query: str, stream_query: str,
+                             parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Run an algorithm over the whole projection and return results for source nodes.
+
+        The algorithm mutates RESULT_PROPERTY on the in-memory graph, and
+        gds.graph.nodeProperty.stream reads it back filtered to the source
+        label inside GDS, so only source nodes are resolved with asNode
+        (and only after ORDER BY/LIMIT). The property is removed again
+        afterwards; it is also cleared first, since in-memory mutations
+        are not rolled back if a previous run failed midway.
+
+        Args:
+            mutate_query: Algorithm call writing to $property
+            stream_query: Query streaming $property for $source_label nodes
+            parameters: Algorithm parameters
+
+        Returns:
+            Records of stream_query
+        """
+        params = self._result_parameters(parameters)
+        _, _, results, _ = self.connector.run_procedures([
+            (DROP_RESULT_QUERY, params),
+            (mutate_query, params),
+            (stream_query, params),
+            (DROP_RESULT_QUERY, params)
+        ])
+        return results
+
+    def _result_parameters(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the graph, result property and source node settings to parameters."""
+        return {
+            **parameters,
+            'graph_name': self.config.graph_name,
+            'property': RESULT_PROPERTY,
+            'source_label': self.config.source_label,
+            'id_property': self.config.source_id_property
+        }
 
     def get_projection_stats(self) -> Dict[str, Any]:
         """
@@ -303,30 +391,58 @@ class GDSPropertyProjectionManager:
         """
         stats = {}
 
-        # Basic info
-        info = self.get_projection_info()
-        if info:
-            stats['exists'] = True
-            stats['node_count'] = info['nodeCount']
-            stats['relationship_count'] = info['relationshipCount']
-            stats['memory_usage'] = info['memoryUsage']
-        else:
+        info_query = """
+        CALL gds.graph.list($graph_name)
+        YIELD graphName, nodeCount, relationshipCount, memoryUsage
+        RETURN graphName, nodeCount, relationshipCount, memoryUsage
+        """
+        # Degree distribution of the source nodes. Degrees are computed over
+        # the whole projection and read back for the source label only (as in
+        # _run_on_source_nodes); apoc.agg.statistics aggregates them into a
+        # fixed-size histogram instead of collecting and sorting every value
+        degree_mutate_query = """
+        CALL gds.degree.mutate($graph_name, {mutateProperty: $property})
+        YIELD nodePropertiesWritten
+        RETURN nodePropertiesWritten
+        """
+        degree_query = """
+        CALL gds.graph.nodeProperty.stream($graph_name, $property, [$source_label])
+        YIELD propertyValue
+        WITH apoc.agg.statistics(propertyValue, [0.5, 0.9, 0.99]) AS s
+        RETURN
+            s.min AS min_degree,
+            s.max AS max_degree,
+            s.mean AS avg_degree,
+            s['0.5'] AS median_degree,
+            s['0.9'] AS p90_degree,
+            s['0.99'] AS p99_degree
+        """
+        params = self._result_parameters({})
+
+        # All calls run on one session (the degree mutate is a catalog write)
+        try:
+            info_result, _, _, degree_result, _ = self.connector.run_procedures([
+                (info_query, params),
+                (DROP_RESULT_QUERY, params),
+                (degree_mutate_query, params),
+                (degree_query, params),
+                (DROP_RESULT_QUERY, params)
+            ])
+        except Exception as e:
+            if "does not exist" in str(e).lower():
+                stats['exists'] = False
+                return stats
+            raise
+
+        if not info_result:
             stats['exists'] = False
             return stats
 
-        # Degree distribution
-        degree_query = f"""
-        CALL gds.degree.stream('{self.config.graph_name}')
-        YIELD nodeId, score
-        WITH gds.util.asNode(nodeId) AS node, score
-        WHERE '{self.config.source_label}' IN labels(node)
-        RETURN
-            min(score) AS min_degree,
-            max(score) AS max_degree,
-            avg(score) AS avg_degree,
-            percentileCont(score, 0.5) AS median_degree
-        """
-        degree_result = self.connector.execute_query(degree_query)
+        info = info_result[0]
+        stats['exists'] = True
+        stats['node_count'] = info['nodeCount']
+        stats['relationship_count'] = info['relationshipCount']
+        stats['memory_usage'] = info['memoryUsage']
         if degree_result:
             stats['degree_stats'] = degree_result[0]
 
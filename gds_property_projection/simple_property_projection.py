@@ -3,22 +3,44 @@ Simple script to create Property nodes from User properties.
 No over-engineering - just gets the job done.
 """
 
-from neo4j import GraphDatabase
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from common import Neo4jConnector, Neo4jConfig
+from gds_property_projection import (
+    GDSPropertyProjectionManager,
+    MaterializedPropertyProjection,
+    PropertyProjectionConfig
+)
 
 # ========================================
 # CONFIGURATION - Edit these values
 # ========================================
 
-NEO4J_URI = "bolt://44.204.34.69"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "decibels-defenses-president"
+NEO4J_CONFIG = Neo4jConfig(
+    uri="bolt://44.204.34.69",
+    user="neo4j",
+    password="decibels-defenses-president",
+    max_connection_pool_size=50
+)
 
 # Projecting all properties of User
-# NODE_TYPE="User"
-# PROPERTIES_TO_PROJECT = ["name", "id", "createdAt", "description", "url", "followers", "total_view_count"]
+# CONFIG = PropertyProjectionConfig(
+#     source_label="User",
+#     properties_to_project=["name", "id", "createdAt", "description", "url", "followers", "total_view_count"],
+#     graph_name="user-props"
+# )
 # Project properties of Team chosen by EDA to be semi-unique to get rid of those with high centrality
-NODE_TYPE="Team"
-PROPERTIES_TO_PROJECT = ["name"]
+CONFIG = PropertyProjectionConfig(
+    source_label="Team",
+    properties_to_project=["name"],
+    graph_name="team-props",
+    # Nodes per write transaction
+    batch_size=5000
+)
 # Limit to 5k users
 USER_LIMIT = 5000
 
@@ -27,183 +49,172 @@ USER_LIMIT = 5000
 # MAIN SCRIPT
 # ========================================
 
+_CONNECTOR = None
+
+
+def get_connector() -> Neo4jConnector:
+    """Return the shared connector, creating it on first use (its driver is closed at exit)."""
+    global _CONNECTOR
+    if _CONNECTOR is None:
+        _CONNECTOR = Neo4jConnector(NEO4J_CONFIG)
+    return _CONNECTOR
+
+
+def ensure_indexes(session):
+    """Index Property (name, value) so each MERGE is a seek, not a label scan."""
+    session.run(
+        "CREATE CONSTRAINT property_name_value IF NOT EXISTS "
+        "FOR (p:Property) REQUIRE (p.name, p.value) IS UNIQUE"
+    ).consume()
+
+
+def read_summary(tx):
+    """Property/HAS totals and the 10 most shared Property nodes, in one read transaction."""
+    total_props = tx.run("MATCH (p:Property) RETURN count(p) as count").single()["count"]
+    total_rels = tx.run("MATCH ()-[r:HAS]->() RETURN count(r) as count").single()["count"]
+    result = tx.run("""
+        MATCH (p:Property)
+        RETURN p.name AS name, p.value AS value, count{(u)-[:HAS]->(p)} AS user_count
+        ORDER BY user_count DESC
+        LIMIT 10
+    """)
+    sample = pd.DataFrame.from_records(result.values(), columns=result.keys())
+    return total_props, total_rels, sample
+
+
 def create_property_nodes():
     """Create Property nodes from User properties."""
     
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    connector = get_connector()
     
     print("=" * 60)
     print("Creating Property Nodes from User Properties")
     print("=" * 60)
     
-    with driver.session() as session:
+    with connector.session() as session:
         
         # Check how many Users we have
-        result = session.run(f"MATCH (n:{NODE_TYPE}) RETURN count(n) as count")
-        total_users = result.single()["count"]
+        total_users = connector.get_node_count(CONFIG.source_label)
         print(f"\nTotal User nodes: {total_users:,}")
         print(f"Processing in batches of : {USER_LIMIT:,}")
         
-        # For each property, create Property nodes
-        for prop_name in PROPERTIES_TO_PROJECT:
-            print(f"\n[{prop_name}]")
-            
-            query = f"""
-            MATCH (u:{NODE_TYPE})
-            WHERE u.{prop_name} IS NOT NULL
-            WITH u LIMIT {USER_LIMIT}
-            
-            // Create Property node for each unique value
-            WITH u, u.{prop_name} AS propValue
-            MERGE (p:Property {{name: '{prop_name}', value: toString(propValue)}})
-            
-            // Create HAS relationship
-            MERGE (u)-[:HAS]->(p)
-            
-            RETURN count(DISTINCT p) AS props_created, count(*) AS rels_created
-            """
-            
-            result = session.run(query)
-            stats = result.single()
-            
-            print(f"  ✓ Created {stats['props_created']} Property nodes")
-            print(f"  ✓ Created {stats['rels_created']} HAS relationships")
+        ensure_indexes(session)
+        
+        # Create Property nodes for every property in one call: one pass per
+        # property (each limited to USER_LIMIT nodes), with the Property and
+        # HAS MERGEs in the same batches and the counts aggregated by APOC
+        print(f"\nProperties: {', '.join(CONFIG.properties_to_project)}")
+        query = """
+        CALL apoc.periodic.iterate(
+            $outer,
+            'MERGE (p:Property {name: propName, value: toString(propValue)})
+             MERGE (u)-[:HAS]->(p)',
+            {batchSize: $batch_size, parallel: false,
+             params: {props: $props, limit: $limit}}
+        )
+        YIELD batches, total, committedOperations, updateStatistics
+        RETURN batches, total, committedOperations, updateStatistics
+        """
+        outer = f"""
+        UNWIND $props AS propName
+        CALL {{
+            WITH propName
+            MATCH (u:{CONFIG.source_label})
+            WHERE u[propName] IS NOT NULL
+            RETURN u LIMIT $limit
+        }}
+        RETURN u, propName, u[propName] AS propValue
+        """
+        
+        result = session.run(query, outer=outer, props=CONFIG.properties_to_project,
+                             limit=USER_LIMIT, batch_size=CONFIG.batch_size)
+        record = result.single()
+        stats = record["updateStatistics"]
+        
+        print(f"  ✓ Processed {record['committedOperations']:,} of {record['total']:,} "
+              f"rows in {record['batches']} batches")
+        print(f"  ✓ Created {stats.get('nodesCreated', 0)} Property nodes")
+        print(f"  ✓ Created {stats.get('relationshipsCreated', 0)} HAS relationships")
         
         # Show what we created
         print("\n" + "=" * 60)
         print("Summary")
         print("=" * 60)
         
-        result = session.run("MATCH (p:Property) RETURN count(p) as count")
-        total_props = result.single()["count"]
+        total_props, total_rels, sample = session.execute_read(read_summary)
         print(f"Total Property nodes: {total_props:,}")
-        
-        result = session.run("MATCH ()-[r:HAS]->() RETURN count(r) as count")
-        total_rels = result.single()["count"]
         print(f"Total HAS relationships: {total_rels:,}")
         
         # Show sample
         print("\nSample Property nodes:")
-        result = session.run("""
-            MATCH (p:Property)
-            RETURN p.name AS name, p.value AS value, count{(u)-[:HAS]->(p)} AS user_count
-            ORDER BY user_count DESC
-            LIMIT 10
-        """)
-        
-        for i, record in enumerate(result, 1):
-            print(f"  {i}. {record['name']}={record['value']}: {record['user_count']} users")
-    
-    driver.close()
+        sample.index += 1
+        print(sample.to_string())
     print("\n✓ Done!")
 
 
-def create_gds_projection(projection_name):
-    """Create a simple GDS projection."""
-    
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+def create_gds_projection():
+    """Create (or reuse) the GDS projection of source and Property nodes."""
     
     print("\n" + "=" * 60)
     print("Creating GDS Projection")
     print("=" * 60)
     
-    with driver.session() as session:
-        
-        # # Drop existing projection if it exists
-        # try:
-        #     session.run("CALL gds.graph.drop('user-props')")
-        #     print("Dropped existing projection")
-        # except:
-        #     pass
-        
-        # Create projection
-        query = f"""
-        CALL gds.graph.project(
-            '{projection_name}',
-            ['{NODE_TYPE}', 'Property'],
-            {{HAS: {{orientation: 'NATURAL'}}}}
-        )
-        YIELD graphName, nodeCount, relationshipCount
-        RETURN graphName, nodeCount, relationshipCount
-        """
-        
-        result = session.run(query)
-        stats = result.single()
-        
-        print(f"\n✓ Created projection: {stats['graphName']}")
-        print(f"  - Nodes: {stats['nodeCount']:,}")
-        print(f"  - Relationships: {stats['relationshipCount']:,}")
-    
-    driver.close()
+    return MaterializedPropertyProjection(get_connector(), CONFIG).create_gds_projection()
 
 
 def run_node_similarity():
     """Find similar users based on shared properties."""
     
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-    
     print("\n" + "=" * 60)
     print("Finding Similar Users")
     print("=" * 60)
     
-    with driver.session() as session:
-        
-        query = """
-        CALL gds.nodeSimilarity.stream('user-props', {topK: 5})
-        YIELD node1, node2, similarity
-        WITH gds.util.asNode(node1) AS user1, gds.util.asNode(node2) AS user2, similarity
-        WHERE 'User' IN labels(user1)
-        RETURN user1.id AS user1_id, user2.id AS user2_id, similarity
-        ORDER BY similarity DESC
-        LIMIT 20
-        """
-        
-        result = session.run(query)
-        
-        print("\nTop 20 similar user pairs:")
-        for i, record in enumerate(result, 1):
-            print(f"  {i}. User {record['user1_id']} ↔ User {record['user2_id']}: {record['similarity']:.3f}")
+    manager = GDSPropertyProjectionManager(get_connector(), CONFIG)
+    results = manager.run_node_similarity(top_k=5)
     
-    driver.close()
+    print("\nTop 20 similar user pairs:")
+    for i, record in enumerate(results[:20], 1):
+        print(f"  {i}. User {record['node1_id']} ↔ User {record['node2_id']}: {record['similarity']:.3f}")
 
 
-def run_node_centrality(projection_name):
+def run_node_centrality():
     """Find the top nodes by degree centrality."""
 
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-
     print("\n" + "=" * 60)
-    print(f"Finding Top {NODE_TYPE} by Degree Centrality")
+    print(f"Finding Top {CONFIG.source_label} by Degree Centrality")
     print("=" * 60)
 
-    with driver.session() as session:
-        query = f"""
-        CALL gds.degree.stream('{projection_name}')
+    # Records are pulled in batches of fetch_size and printed as they arrive
+    with get_connector().session() as session:
+        query = """
+        CALL gds.degree.stream($projection_name)
         YIELD nodeId, score
         WITH gds.util.asNode(nodeId) AS n, score
+        WHERE $node_type IN labels(n)
         RETURN labels(n) AS type, n.name AS name, score
-        ORDER BY score ASC
+        ORDER BY score DESC
+        LIMIT $limit
         """
 
-        result = session.run(query)
+        # The server keeps only the top rows (a bounded top-K sort)
+        result = session.run(query, projection_name=CONFIG.graph_name,
+                             node_type=CONFIG.source_label, limit=20)
 
-        print("\nTop 20 users by degree centrality:")
+        print(f"\nTop 20 {CONFIG.source_label} nodes by degree centrality:")
         for i, record in enumerate(result, 1):
             print(f"  {i}. {record['type']} {record['name']}: {record['score']:.3f}")
 
-    driver.close()
-
 
 # def cleanup():
 #     """Delete all Property nodes and HAS relationships."""
 #
-#     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+#     connector = get_connector()
 #
 #     print("\n" + "=" * 60)
 #     print("Cleanup")
 #     print("=" * 60)
 #
-#     with driver.session() as session:
+#     with connector.session() as session:
 #         # Drop GDS projection
 #         try:
 #             session.run("CALL gds.graph.drop('user-props')")
@@ -215,15 +226,13 @@ def run_node_centrality(projection_name):
 #         result = session.run("MATCH (p:Property) DETACH DELETE p RETURN count(p) as deleted")
 #         deleted = result.single()["deleted"]
 #         print(f"✓ Deleted {deleted} Property nodes")
-#
-#     driver.close()
 
 
 if __name__ == "__main__":
     # Run the workflow
     # create_property_nodes()
-    # create_gds_projection(projection_name="team-props")
-    run_node_centrality(projection_name="team-props")
+    # create_gds_projection()
+    run_node_centrality()
     
     # Uncomment to cleanup when done:
     # cleanup()
@@ -8,12 +8,62 @@ This script helps you:
 4. Suggest configuration
 """
 
+import hashlib
+import json
+import os
+import shelve
 import sys
+import time
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from common import Neo4jConnector, Neo4jConfig
 
+# Node analysis results are cached on disk between runs (pass --no-cache
+# to bypass); the connection probe and GDS check always hit the database
+CACHE_PATH = str(Path(__file__).with_name(".validate_cache"))
+CACHE_TTL = 3600  # seconds
+USE_CACHE = True
+
+
+def cached_query(connector: Neo4jConnector, query: str, parameters: dict = None) -> list:
+    """
+    Run a read query through the on-disk result cache.
+    
+    Entries are keyed by database URI, database name, query text and
+    parameters, and expire after CACHE_TTL seconds.
+    """
+    if not USE_CACHE:
+        return connector.execute_query(query, parameters)
+    
+    key = hashlib.sha1("\n".join([
+        connector.config.uri,
+        connector.config.database,
+        query,
+        json.dumps(parameters or {}, sort_keys=True)
+    ]).encode("utf-8")).hexdigest()
+    
+    with shelve.open(CACHE_PATH) as cache:
+        entry = cache.get(key)
+        if entry is not None and time.time() - entry[0] < CACHE_TTL:
+            return entry[1]
+        result = connector.execute_query(query, parameters)
+        cache[key] = (time.time(), result)
+        return result
+
+
+def prompt(env: str, message: str, default: str) -> str:
+    """
+    Read a setting from the terminal, or from the environment when not interactive.
+    
+    An empty answer (or a non-TTY stdin) falls back to the environment
+    variable, then to the default.
+    """
+    fallback = os.environ.get(env) or default
+    if not sys.stdin.isatty():
+        return fallback
+    return input(message).strip() or fallback
+
 
 def validate_connection(config: Neo4jConfig) -> bool:
     """Validate Neo4j connection."""
@@ -53,7 +103,7 @@ def analyze_user_nodes(connector: Neo4jConnector, label: str = "User") -> dict:
     
     # Count nodes
     try:
-        result = connector.execute_query(f"MATCH (n:{label}) RETURN count(n) as count")
+        result = cached_query(connector, f"MATCH (n:{label}) RETURN count(n) as count")
         count = result[0]['count'] if result else 0
         analysis['count'] = count
         print(f"    ✓ Found {count:,} {label} nodes")
@@ -75,7 +125,7 @@ def analyze_user_nodes(connector: Neo4jConnector, label: str = "User") -> dict:
         RETURN DISTINCT key
         ORDER BY key
         """
-        result = connector.execute_query(query)
+        result = cached_query(connector, query)
         properties = [r['key'] for r in result]
         analysis['properties'] = properties
         print(f"    ✓ Found {len(properties)} properties:")
@@ -89,32 +139,44 @@ def analyze_user_nodes(connector: Neo4jConnector, label: str = "User") -> dict:
     print(f"\n[4] Analyzing Property Distributions...")
     property_stats = {}
     
-    for prop in properties[:10]:  # Limit to first 10 properties
-        try:
-            query = f"""
-            MATCH (n:{label})
-            WHERE n.{prop} IS NOT NULL
-            WITH n.{prop} AS value
-            RETURN 
-                count(DISTINCT value) AS unique_values,
-                count(value) AS total_values
-            """
-            result = connector.execute_query(query)
-            if result:
-                stats = result[0]
-                property_stats[prop] = stats
-                
-                # Determine if categorical or unique
-                ratio = stats['unique_values'] / stats['total_values'] if stats['total_values'] > 0 else 0
-                prop_type = "UNIQUE" if ratio > 0.9 else "CATEGORICAL"
-                
-                print(f"    {prop}:")
-                print(f"        Type: {prop_type}")
-                print(f"        Unique values: {stats['unique_values']:,}")
-                print(f"        Total values: {stats['total_values']:,}")
-                print(f"        Uniqueness: {ratio:.2%}")
-        except Exception as e:
-            print(f"    ⚠ Could not analyze {prop}: {e}")
+    # One label scan covers every property (limited to the first 10)
+    query = f"""
+    MATCH (n:{label})
+    UNWIND $props AS key
+    WITH key, n[key] AS value
+    WHERE value IS NOT NULL
+    RETURN 
+        key,
+        count(DISTINCT value) AS unique_values,
+        count(value) AS total_values
+    """
+    props = properties[:10]
+    try:
+        rows = {
+            row['key']: row
+            for row in cached_query(connector, query, {'props': props})
+        }
+    except Exception as e:
+        print(f"    ⚠ Could not analyze properties: {e}")
+        rows = None
+    
+    for prop in props if rows is not None else []:
+        row = rows.get(prop, {})
+        stats = {
+            'unique_values': row.get('unique_values', 0),
+            'total_values': row.get('total_values', 0)
+        }
+        property_stats[prop] = stats
+        
+        # Determine if categorical or unique
+        ratio = stats['unique_values'] / stats['total_values'] if stats['total_values'] > 0 else 0
+        prop_type = "UNIQUE" if ratio > 0.9 else "CATEGORICAL"
+        
+        print(f"    {prop}:")
+        print(f"        Type: {prop_type}")
+        print(f"        Unique values: {stats['unique_values']:,}")
+        print(f"        Total values: {stats['total_values']:,}")
+        print(f"        Uniqueness: {ratio:.2%}")
     
     analysis['property_stats'] = property_stats
     
@@ -160,23 +222,28 @@ def suggest_configuration(analysis: dict, label: str = "User") -> None:
 
 def main():
     """Main validation workflow."""
+    global USE_CACHE
+    USE_CACHE = "--no-cache" not in sys.argv[1:]
+    
     print("=" * 80)
     print("GDS PROPERTY PROJECTION - SETUP VALIDATION")
     print("=" * 80)
     
     # Configuration
     print("\nEnter your Neo4j connection details:")
-    print("(Press Enter to use defaults shown in brackets)")
+    print("(Press Enter to use defaults shown in brackets; NEO4J_URI, NEO4J_USER,")
+    print(" NEO4J_PASSWORD and NEO4J_LABEL are used instead when set or when")
+    print(" stdin is not a terminal)")
     
-    uri = input("URI [bolt://localhost:7687]: ").strip() or "bolt://44.204.34.69"
-    user = input("User [neo4j]: ").strip() or "neo4j"
-    password = input("Password: ").strip() or "decibels-defenses-president"
+    uri = prompt("NEO4J_URI", "URI [bolt://localhost:7687]: ", "bolt://44.204.34.69")
+    user = prompt("NEO4J_USER", "User [neo4j]: ", "neo4j")
+    password = prompt("NEO4J_PASSWORD", "Password: ", "decibels-defenses-president")
     
     if not password:
         print("\n⚠ No password provided. Using 'password' as default.")
         password = "password"
     
-    label = input("Node label to analyze [User]: ").strip() or "User"
+    label = prompt("NEO4J_LABEL", "Node label to analyze [User]: ", "User")
     
     config = Neo4jConfig(uri=uri, user=user, password=password)
     
@@ -1,4 +1,10 @@
-from neo4j import GraphDatabase
+import os
+import sys
+from itertools import islice
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from common import Neo4jConfig, get_driver
 
 URI = "bolt://44.204.34.69"
 AUTH = ("neo4j", "decibels-defenses-president")
@@ -12,34 +18,80 @@ NODE_LABELS = ["Stream"]
 # Output file
 OUTPUT_PATH = "node_similarity.txt"
 
+# Records pulled per round-trip; the stream can return millions of pairs
+FETCH_SIZE = 10_000
+
+# Output lines joined per write call
+WRITE_BATCH = 10_000
+
+# topK is the GDS default, made explicit; pairs below the cutoff are pruned
+# inside the algorithm and never streamed (0 keeps every positive pair)
+SIMILARITY_CONFIG = {
+    "nodeLabels": NODE_LABELS,
+    "topK": int(os.getenv("NODE_SIMILARITY_TOP_K", "10")),
+    "similarityCutoff": float(os.getenv("NODE_SIMILARITY_CUTOFF", "0")),
+}
+
+# Set SERVER_EXPORT=1 to have Neo4j write the file itself with
+# apoc.export.csv.query (requires APOC and apoc.export.file.enabled=true);
+# the file is then created in the server's import directory, not locally
+SERVER_EXPORT = os.getenv("SERVER_EXPORT") == "1"
+
+# Each node is resolved once; only scalar columns are returned
+SIMILARITY_QUERY = (
+    "CALL gds.nodeSimilarity.stream($name, $config) "
+    "YIELD node1, node2, similarity "
+    "WHERE similarity > 0 "
+    "WITH gds.util.asNode(node1) AS n1, gds.util.asNode(node2) AS n2, similarity "
+    "RETURN n1.id AS node1_id, "
+    "       n1.component_id_2 AS node1_component_id_2, "
+    "       n2.id AS node2_id, "
+    "       n2.component_id_2 AS node2_component_id_2, "
+    "       similarity "
+    "ORDER BY similarity DESC"
+)
+
+
+def export_on_server(session) -> None:
+    """Write the similarity file on the server, without streaming rows to Python."""
+    record = session.run(
+        "CALL apoc.export.csv.query($query, $path, { "
+        "  delim: '\\t', quotes: 'none', header: false, "
+        "  params: {name: $name, config: $config} "
+        "}) "
+        "YIELD file, rows "
+        "RETURN file, rows",
+        query=SIMILARITY_QUERY,
+        path=OUTPUT_PATH,
+        name=GRAPH_NAME,
+        config=SIMILARITY_CONFIG,
+    ).single()
+    print(f"Server wrote {record['rows']} rows to {record['file']}")
+
 
 def main() -> None:
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    with driver:
-        with driver.session() as session:
-            result = session.run(
-                "CALL gds.nodeSimilarity.stream($name, { "
-                "  nodeLabels: $labels "
-                "}) "
-                "YIELD node1, node2, similarity "
-                "WHERE similarity > 0 "
-                "RETURN gds.util.asNode(node1).id AS node1_id, "
-                "       gds.util.asNode(node1).component_id_2 AS node1_component_id_2, "
-                "       gds.util.asNode(node2).id AS node2_id, "
-                "       gds.util.asNode(node2).component_id_2 AS node2_component_id_2, "
-                "       similarity "
-                "ORDER BY similarity DESC",
-                name=GRAPH_NAME,
-                labels=NODE_LABELS,
-            )
-
-            with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-                for record in result:
-                    f.write(
-                        f"{record['node1_id']}\t{record['node1_component_id_2']}\t"
-                        f"{record['node2_id']}\t{record['node2_component_id_2']}\t"
-                        f"{record['similarity']}\n"
-                    )
+    driver = get_driver(Neo4jConfig(URI, *AUTH))
+    with driver.session(fetch_size=FETCH_SIZE) as session:
+        if SERVER_EXPORT:
+            export_on_server(session)
+            return
+
+        result = session.run(
+            SIMILARITY_QUERY,
+            name=GRAPH_NAME,
+            config=SIMILARITY_CONFIG,
+        )
+
+        # Records are value tuples in column order; each becomes one
+        # tab-joined line, and WRITE_BATCH lines go out in a single write
+        # through a 1 MiB buffer
+        rows = ("\t".join(map(str, record.values())) for record in result)
+        with open(OUTPUT_PATH, "w", encoding="utf-8", buffering=1 << 20) as f:
+            while True:
+                batch = list(islice(rows, WRITE_BATCH))
+                if not batch:
+                    break
+                f.write("\n".join(batch) + "\n")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,7 @@
 import json
+import os
+
+import torch
 
 # Import modules from OntoAligner
 from ontoaligner import ontology, encoder
@@ -20,9 +23,18 @@ encoder_model = encoder.ConceptParentLightweightEncoder()
 encoder_output = encoder_model(source=dataset['source'], target=dataset['target'])
 
 # Initialize retrieval model
-model = SBERTRetrieval(device='cpu', top_k=10)
+# Encode on the GPU when one is available (override with SBERT_DEVICE)
+device = os.getenv("SBERT_DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+model = SBERTRetrieval(device=device, top_k=10)
 model.load(path="all-MiniLM-L6-v2")
 
+# On CPU, run the transformer's Linear layers in int8 (dynamic
+# quantization) for faster encoding; set SBERT_INT8=0 to keep FP32
+if device == "cpu" and os.getenv("SBERT_INT8", "1") == "1":
+    model.model = torch.quantization.quantize_dynamic(
+        model.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
 # Generate matchings
 matchings = model.generate(input_data=encoder_output)
 
@@ -1,48 +1,149 @@
-from neo4j import GraphDatabase
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from common import Neo4jConfig, get_driver
 
 URI = "bolt://44.204.34.69"
 AUTH = ("neo4j", "decibels-defenses-president")
 
 LABEL = "Stream"
 BATCH_SIZE = 1000
+# Batches read ahead of the writer; bounds memory if reads outpace writes
+QUEUE_SIZE = 2
 TARGET_KEYS = ["total_view_count", "followers", "description", "id", "createdAt"]
 
-def fetch_batch(tx, label, skip, limit):
+# Set SERVER_INGEST=1 to run the whole ingest inside Neo4j with
+# apoc.periodic.iterate (requires APOC) instead of paging through Python
+SERVER_INGEST = os.getenv("SERVER_INGEST") == "1"
+
+def fetch_batch(tx, label, cursor, limit):
+    # Keyset pagination: resume after the last elementId seen instead of
+    # SKIPping (and returning) every earlier row again. elementId has no
+    # index, so each page is still a label scan plus a top-k sort; this is
+    # lighter than SKIP, not O(batch). Only the TARGET_KEYS values are sent
+    # back, in TARGET_KEYS order
+    if cursor is None:
+        where = ""
+    else:
+        where = "WHERE elementId(n) > $cursor"
     query = f"""
     MATCH (n:`{label}`)
-    RETURN elementId(n) AS eid, properties(n) AS props
+    {where}
+    RETURN elementId(n) AS eid, [k IN $keys | n[k]] AS vals
     ORDER BY elementId(n)
-    SKIP $skip LIMIT $limit
+    LIMIT $limit
     """
-    return list(tx.run(query, skip=skip, limit=limit))
+    return list(tx.run(query, cursor=cursor, limit=limit, keys=TARGET_KEYS))
+
+def ensure_constraint(tx):
+    # Makes each Property MERGE/MATCH below an index seek
+    tx.run(
+        "CREATE CONSTRAINT property_key_value IF NOT EXISTS "
+        "FOR (p:Property) REQUIRE (p.key, p.value) IS UNIQUE"
+    ).consume()
 
 def ingest_properties(tx, label, batch):
+    # Distinct (key, value) pairs are MERGEd once per batch, then every
+    # (node, key, value) row is linked to its Property by an index seek
+    pairs = {}
+    rels = []
+    for row in batch:
+        for k, v in zip(TARGET_KEYS, row["vals"]):
+            if v is None:
+                continue
+            # List values are not hashable; key them by their tuple
+            pairs[(k, tuple(v) if isinstance(v, list) else v)] = (k, v)
+            rels.append({"eid": row["eid"], "k": k, "v": v})
+
+    tx.run(
+        """
+        UNWIND $pairs AS pair
+        MERGE (:Property {key: pair[0], value: pair[1]})
+        """,
+        pairs=list(pairs.values()),
+    ).consume()
     query = f"""
-    UNWIND $batch AS row
+    UNWIND $rels AS row
     MATCH (n:`{label}`) WHERE elementId(n) = row.eid
-    WITH n, row.props AS props
-    UNWIND $keys AS k
-    WITH n, k, props[k] AS v
-    WHERE v IS NOT NULL
-    MERGE (p:Property {{key: k, value: v}})
+    MATCH (p:Property {{key: row.k, value: row.v}})
     MERGE (n)-[:HAS]->(p)
     """
-    tx.run(query, batch=batch, keys=TARGET_KEYS)
+    tx.run(query, rels=rels).consume()
 
-def main():
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    with driver:
+def ingest_on_server(session, label):
+    # One call, committed every BATCH_SIZE Stream nodes; not parallel since
+    # batches MERGE the same Property nodes
+    record = session.run(
+        """
+        CALL apoc.periodic.iterate(
+          $outer,
+          "UNWIND $keys AS k
+           WITH n, k, n[k] AS v WHERE v IS NOT NULL
+           MERGE (p:Property {key: k, value: v})
+           MERGE (n)-[:HAS]->(p)",
+          {batchSize: $batch, parallel: false, params: {keys: $keys}}
+        )
+        YIELD batches, total, failedOperations, errorMessages
+        RETURN batches, total, failedOperations, errorMessages
+        """,
+        outer=f"MATCH (n:`{label}`) RETURN n",
+        keys=TARGET_KEYS,
+        batch=BATCH_SIZE,
+    ).single()
+    print(f"Ingested {record['total']} nodes in {record['batches']} batches")
+    if record["failedOperations"]:
+        raise RuntimeError(f"{record['failedOperations']} operations failed: {record['errorMessages']}")
+
+def produce_batches(driver, batches, errors):
+    # Reads keyset pages on this thread's own session and queues them;
+    # None marks the end (also after a failure, which goes to errors)
+    try:
         with driver.session() as session:
-            skip = 0
+            cursor = None
             while True:
-                records = session.execute_read(fetch_batch, LABEL, skip, BATCH_SIZE)
+                records = session.execute_read(fetch_batch, LABEL, cursor, BATCH_SIZE)
                 if not records:
                     break
 
-                batch = [{"eid": r["eid"], "props": r["props"]} for r in records]
-                session.execute_write(ingest_properties, LABEL, batch)
+                batches.put([{"eid": r["eid"], "vals": r["vals"]} for r in records])
+
+                if len(records) < BATCH_SIZE:
+                    break
+                cursor = records[-1]["eid"]
+    except Exception as e:
+        errors.append(e)
+    finally:
+        batches.put(None)
+
+def main():
+    driver = get_driver(Neo4jConfig(URI, *AUTH))
+    with driver.session() as session:
+        session.execute_write(ensure_constraint)
+        if SERVER_INGEST:
+            ingest_on_server(session, LABEL)
+            return
+
+    # The next page is read while the current one is written; the
+    # driver is shared, each thread has its own session
+    batches = queue.Queue(maxsize=QUEUE_SIZE)
+    errors = []
+    producer = threading.Thread(target=produce_batches, args=(driver, batches, errors), daemon=True)
+    producer.start()
+
+    with driver.session() as session:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            session.execute_write(ingest_properties, LABEL, batch)
 
-                skip += BATCH_SIZE
+    producer.join()
+    if errors:
+        raise errors[0]
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
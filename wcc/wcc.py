@@ -1,4 +1,8 @@
-from neo4j import GraphDatabase
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from common import Neo4jConfig, get_driver
 
 URI = "bolt://44.204.34.69"
 AUTH = ("neo4j", "decibels-defenses-president")
@@ -10,62 +14,103 @@ USER_LABEL = "Stream"
 PROPERTY_LABEL = "Property"
 REL_TYPE = "HAS"
 
+# In-memory property WCC results are mutated into; Stream nodes are read
+# back from it with a label filter inside GDS
+COMPONENT_PROPERTY = "wcc_component"
+# Nodes updated per write transaction
+WRITE_BATCH = 10_000
+
 
 def main() -> None:
-    driver = GraphDatabase.driver(URI, auth=AUTH)
-    with driver:
-        with driver.session() as session:
-            # # Drop if exists to allow re-runs
-            # session.run(
-            #     "CALL gds.graph.exists($name) YIELD exists "
-            #     "WITH exists WHERE exists "
-            #     "CALL gds.graph.drop($name) YIELD graphName "
-            #     "RETURN graphName",
-            #     name=GRAPH_NAME,
-            # )
-            #
-            # # Project User-Property graph
-            # session.run(
-            #     "CALL gds.graph.project(\n"
-            #     "  $name,\n"
-            #     "  [$user_label, $property_label],\n"
-            #     "  {\n"
-            #     "    HAS: {\n"
-            #     "      type: $rel_type,\n"
-            #     "      orientation: 'UNDIRECTED'\n"
-            #     "    }\n"
-            #     "  }\n"
-            #     ")",
-            #     name=GRAPH_NAME,
-            #     user_label=USER_LABEL,
-            #     property_label=PROPERTY_LABEL,
-            #     rel_type=REL_TYPE,
-            # )
+    driver = get_driver(Neo4jConfig(URI, *AUTH))
+    with driver.session() as session:
+        # # Drop if exists to allow re-runs
+        # session.run(
+        #     "CALL gds.graph.exists($name) YIELD exists "
+        #     "WITH exists WHERE exists "
+        #     "CALL gds.graph.drop($name) YIELD graphName "
+        #     "RETURN graphName",
+        #     name=GRAPH_NAME,
+        # )
+        #
+        # # Project User-Property graph
+        # session.run(
+        #     "CALL gds.graph.project(\n"
+        #     "  $name,\n"
+        #     "  [$user_label, $property_label],\n"
+        #     "  {\n"
+        #     "    HAS: {\n"
+        #     "      type: $rel_type,\n"
+        #     "      orientation: 'UNDIRECTED'\n"
+        #     "    }\n"
+        #     "  }\n"
+        #     ")",
+        #     name=GRAPH_NAME,
+        #     user_label=USER_LABEL,
+        #     property_label=PROPERTY_LABEL,
+        #     rel_type=REL_TYPE,
+        # )
+
+        # memory_estimate = session.run("CALL gds.wcc.write.estimate($name, { writeProperty: 'component' }) "
+        #                   "YIELD nodeCount, relationshipCount, bytesMin, bytesMax, requiredMemory",
+        #                   name=GRAPH_NAME)
+        # print(f"Memory estimate: nodeCount	relationshipCount	bytesMin	bytesMax	requiredMemory")
+        # memory_estimate=memory_estimate.single()
+        # print("        "+memory_estimate["nodeCount"]+"	"+memory_estimate["relationshipCount"]+"	"+memory_estimate["bytesMin"]+"	"+memory_estimate["bytesMax"]+"	"+memory_estimate["requiredMemory"]+"	")
+        # Compute WCC once into the projection (dropping a previous run's
+        # result first). minComponentSize is not used: it counts Property
+        # nodes too, so it would not drop components with a single Stream
+        # node, and nodes below it get no mutated value. Singletons are
+        # filtered below on the Stream-only size instead
+        session.run(
+            "CALL gds.graph.nodeProperties.drop($name, [$prop], {failIfMissing: false}) "
+            "YIELD propertiesRemoved "
+            "RETURN propertiesRemoved",
+            name=GRAPH_NAME,
+            prop=COMPONENT_PROPERTY,
+        ).consume()
+        session.run(
+            "CALL gds.wcc.mutate($name, {mutateProperty: $prop}) "
+            "YIELD componentCount "
+            "RETURN componentCount",
+            name=GRAPH_NAME,
+            prop=COMPONENT_PROPERTY,
+        ).consume()
 
-            # memory_estimate = session.run("CALL gds.wcc.write.estimate($name, { writeProperty: 'component' }) "
-            #                   "YIELD nodeCount, relationshipCount, bytesMin, bytesMax, requiredMemory",
-            #                   name=GRAPH_NAME)
-            # print(f"Memory estimate: nodeCount	relationshipCount	bytesMin	bytesMax	requiredMemory")
-            # memory_estimate=memory_estimate.single()
-            # print("        "+memory_estimate["nodeCount"]+"	"+memory_estimate["relationshipCount"]+"	"+memory_estimate["bytesMin"]+"	"+memory_estimate["bytesMax"]+"	"+memory_estimate["requiredMemory"]+"	")
-            # Stream WCC, attach component_id to Stream nodes in components size > 1,
-            # and show counts per componentId
-            result = session.run(
-                "CALL gds.wcc.stream($name) "
-                "YIELD nodeId, componentId "
-                "WITH gds.util.asNode(nodeId) AS n, componentId "
-                "WHERE n:Stream "
-                "WITH componentId, collect(n) AS nodes, count(*) AS size "
-                "WHERE size > 1 "
-                "UNWIND nodes AS n "
-                "SET n.component_id_2 = componentId "
-                "RETURN componentId, size "
-                "ORDER BY size DESC, componentId ASC",
-                name=GRAPH_NAME,
-            )
-            for record in result:
-                print(record["componentId"], record["size"])
+        # Pass 1: show the number of Stream nodes per component (size > 1)
+        result = session.run(
+            "CALL gds.graph.nodeProperty.stream($name, $prop, [$label]) "
+            "YIELD propertyValue AS componentId "
+            "WITH componentId, count(*) AS size "
+            "WHERE size > 1 "
+            "RETURN componentId, size "
+            "ORDER BY size DESC, componentId ASC",
+            name=GRAPH_NAME,
+            prop=COMPONENT_PROPERTY,
+            label=USER_LABEL,
+        )
+        for record in result:
+            print(record["componentId"], record["size"])
 
+        # Pass 2: attach component_id_2 to Stream nodes in those components,
+        # committing every WRITE_BATCH nodes. Only node ids are collected
+        # per component (no node lookups until the SET)
+        session.run(
+            "CALL gds.graph.nodeProperty.stream($name, $prop, [$label]) "
+            "YIELD nodeId, propertyValue AS componentId "
+            "WITH componentId, collect(nodeId) AS ids "
+            "WHERE size(ids) > 1 "
+            "UNWIND ids AS id "
+            "CALL { "
+            "  WITH id, componentId "
+            "  MATCH (n) WHERE id(n) = id "
+            "  SET n.component_id_2 = componentId "
+            "} IN TRANSACTIONS OF $batch ROWS",
+            name=GRAPH_NAME,
+            prop=COMPONENT_PROPERTY,
+            label=USER_LABEL,
+            batch=WRITE_BATCH,
+        ).consume()
 
 if __name__ == "__main__":
     main()